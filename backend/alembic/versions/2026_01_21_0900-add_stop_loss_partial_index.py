@@ -0,0 +1,29 @@
+"""add partial index for stop-loss monitoring
+
+Revision ID: add_hot_path_indexes
+Revises: fix_stocks_is_active
+Create Date: 2026-01-21 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_hot_path_indexes'
+down_revision = 'fix_stocks_is_active'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Open positions with a stop loss, scanned by monitor_stop_losses and
+    # process_price_events (joined to the stocks that received a price)
+    op.create_index(
+        'ix_positions_stop_loss_open', 'positions', ['stock_id'],
+        unique=False, postgresql_where=sa.text('is_open AND stop_loss_price IS NOT NULL')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_positions_stop_loss_open', table_name='positions')
@@ -0,0 +1,25 @@
+"""add last price to stocks
+
+Revision ID: add_stock_last_price
+Revises: add_hot_path_indexes
+Create Date: 2026-01-22 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_stock_last_price'
+down_revision = 'add_hot_path_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Latest known price, used to pre-filter stop-loss candidates in SQL
+    op.add_column('stocks', sa.Column('last_price', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('stocks', 'last_price')
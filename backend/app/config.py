@@ -10,6 +10,8 @@ class Settings(BaseSettings):
 
     # Database
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 10  # match the largest worker concurrency per process
+    DB_MAX_OVERFLOW: int = 20
 
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
@@ -44,9 +46,17 @@ class Settings(BaseSettings):
     # Claude
     CLAUDE_MODEL: str = "claude-sonnet-4-5-20250929"
     CLAUDE_MAX_TOKENS: int = 4096
+    CLAUDE_ANALYSIS_WORKERS: int = 4  # concurrent symbol analyses
+    CLAUDE_REQUESTS_PER_MINUTE: int = 50
+    CLAUDE_ANALYSIS_CACHE_TTL: int = 900  # seconds to reuse a response for an identical prompt
 
     # Market Data
     ALPHA_VANTAGE_RATE_LIMIT: int = 5  # calls per minute
+    ALPHA_VANTAGE_WORKERS: int = 5  # concurrent requests; the rate limit still applies
+    ALPHA_VANTAGE_INTERACTIVE_MAX_WAIT: float = 2.0  # seconds a request handler waits for the rate limit
+    ALPHA_VANTAGE_BULK_QUOTES: bool = False  # REALTIME_BULK_QUOTES (premium tier only)
+    ALPHA_VANTAGE_OVERVIEW_CACHE_TTL: int = 6 * 3600  # seconds, company overview responses
+    ALPHA_VANTAGE_STATEMENT_CACHE_TTL: int = 24 * 3600  # seconds, financial statement responses
     MARKET_DATA_UPDATE_INTERVAL: int = 3600  # seconds
 
     # Sentiment Analysis
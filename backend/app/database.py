@@ -8,8 +8,13 @@ settings = get_settings()
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_recycle=300,  # Neon closes idle connections after ~5 minutes
+    pool_use_lifo=True,  # Reuse warm connections, let idle overflow expire
+    # Batch executemany UPDATEs (bulk_update_mappings) into pages of
+    # statements instead of one round trip per row
+    executemany_mode="values_plus_batch",
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -13,6 +13,7 @@ class Stock(Base, TimestampMixin):
     sector = Column(String, nullable=True)
     industry = Column(String, nullable=True)
     is_active = Column(Boolean, default=True)
+    last_price = Column(Float, nullable=True)  # Latest close from market data ingestion
 
     # Relationships
     market_data = relationship("MarketDataDaily", back_populates="stock")
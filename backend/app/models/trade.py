@@ -9,6 +9,7 @@ from sqlalchemy import (
     Boolean,
     Index,
     Text,
+    text,
 )
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -101,6 +102,12 @@ class Position(Base, TimestampMixin):
     __tablename__ = "positions"
     __table_args__ = (
         Index("ix_positions_user_stock", "user_id", "stock_id", unique=True),
+        # Stop-loss monitoring scans open positions with a stop loss
+        Index(
+            "ix_positions_stop_loss_open",
+            "stock_id",
+            postgresql_where=text("is_open AND stop_loss_price IS NOT NULL"),
+        ),
     )
 
     id = Column(Integer, primary_key=True, index=True)
@@ -0,0 +1,11 @@
+import redis
+from functools import lru_cache
+from app.config import get_settings
+
+settings = get_settings()
+
+
+@lru_cache()
+def get_redis() -> redis.Redis:
+    """Shared Redis client (same instance as the Celery broker)"""
+    return redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
@@ -0,0 +1,42 @@
+"""
+Short-lived in-process caches for rarely changing lookups
+
+The active stock universe only changes when stock discovery runs, but it
+is read by every analysis pass. Results are cached for a few minutes per
+database and worker process; discovery tasks clear the cache when they
+finish so the process that changed the universe sees it immediately.
+"""
+
+import threading
+from typing import Tuple
+
+from cachetools import TTLCache, cached
+from cachetools.keys import hashkey
+from sqlalchemy.orm import Session
+
+from app.models.stock import Stock
+
+_cache = TTLCache(maxsize=8, ttl=300)
+_lock = threading.Lock()
+
+
+@cached(_cache, key=lambda db: hashkey("active_symbols", str(db.bind.url)), lock=_lock)
+def get_active_symbols(db: Session) -> Tuple[str, ...]:
+    """Get symbols of all active stocks, ordered by symbol
+
+    Only the symbol column is selected, so no Stock instances are built;
+    callers that open their own sessions per symbol don't need the rows.
+    """
+    return tuple(
+        symbol
+        for (symbol,) in db.query(Stock.symbol)
+        .filter(Stock.is_active == True)
+        .order_by(Stock.symbol)
+        .all()
+    )
+
+
+def clear_cache() -> None:
+    """Drop all cached lookups (call after changing the stock universe)"""
+    with _lock:
+        _cache.clear()
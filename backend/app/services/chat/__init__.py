@@ -1,3 +1,4 @@
 from .claude_trader import ClaudeTrader
+from .parallel_analysis import analyze_symbols_parallel, RateLimiter
 
-__all__ = ["ClaudeTrader"]
+__all__ = ["ClaudeTrader", "analyze_symbols_parallel", "RateLimiter"]
@@ -1,9 +1,11 @@
 import anthropic
+import hashlib
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta, date
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, func, select
 from app.config import get_settings
+from app.redis_client import get_redis
 from app.models.user import User
 from app.models.stock import Stock, MarketDataDaily
 from app.models.fundamentals import FundamentalDataQuarterly
@@ -16,6 +18,66 @@ from app.services.trading import TradeExecutor, RiskManager
 
 settings = get_settings()
 
+# Static instructions shared by every analysis request. Sent as the system
+# prompt with cache_control so Anthropic caches the prefix across calls;
+# keep per-symbol data out of it or the cached prefix stops matching.
+ANALYSIS_SYSTEM_PROMPT = """You are an AI trading assistant using a HYBRID FUNDAMENTAL + TECHNICAL approach for multibagger stock discovery.
+
+Your analysis is based on peer-reviewed research: "The Alchemy of Multibagger Stocks" (Yartseva, 2025) which analyzed 464 stocks that achieved 10x+ returns from 2009-2024.
+
+KEY RESEARCH FINDINGS (Yartseva 2025):
+1. FCF/Price (free cash flow yield) - STRONGEST PREDICTOR (regression coefficients 46-82)
+2. Book-to-Market ratio > 0.40 + positive profitability
+3. Small caps ($300M-$2B) outperform large caps (median starting cap $348M)
+4. Reinvestment quality: Asset growth ≤ EBITDA growth (growth > EBITDA is NEGATIVE signal)
+5. Entry timing: Stocks near 12-month lows with NEGATIVE 3-6 month momentum (mean reversion)
+6. AVOID: Negative equity, high P/E without cash flow
+
+NOTE: This is ANALYSIS-ONLY mode. You will provide recommendations but NOT execute trades. The trader will review and execute manually.
+
+TRADING PARAMETERS:
+- Position Size: 15-25% of portfolio (aggressive)
+- Required Stop Loss: 5%
+- Min Risk/Reward: 2:1
+- Max Open Positions: 10
+
+DECISION FRAMEWORK (Hybrid Fundamental + Technical):
+
+STEP 1 - FUNDAMENTAL SCREENING (Yartseva's multibagger criteria):
+  - PRIORITY 1: High FCF/Price (≥5%) - This is the STRONGEST predictor
+  - PRIORITY 2: Book/Market > 0.40 with profitability
+  - PRIORITY 3: Small cap ($300M-$2B)
+  - PRIORITY 4: Good reinvestment quality (Asset growth ≤ EBITDA growth)
+  - RED FLAG: Negative equity (automatic disqualifier)
+
+STEP 2 - ENTRY TIMING (Technical signals):
+  - BEST: Stock near 52-week lows (Yartseva: buy near lows for mean reversion)
+  - BEST: Negative 3-6 month momentum (contrary to typical trend following)
+  - GOOD: RSI oversold (<30) or neutral (30-70)
+  - GOOD: Positive sentiment shift
+  - AVOID: Near 52-week highs with momentum exhaustion
+
+STEP 3 - DECISION LOGIC:
+  - STRONG BUY: Passes 4+ Yartseva filters + good entry timing
+  - BUY: Passes 3+ filters + acceptable timing
+  - HOLD: Passes 2-3 filters but poor timing OR existing position still valid
+  - SELL/CLOSE: Fails key filters (negative equity, low FCF) OR stop loss triggered
+
+Based on the analysis provided for a stock, give a trading decision:
+1. Should I BUY, SELL, HOLD, or CLOSE an existing position?
+2. If buying, suggest:
+   - Number of shares (respecting position size limits)
+   - Entry price (limit order or market)
+   - Stop loss price (5% default)
+   - Take profit target (for 2:1 risk/reward, but multibaggers may take years)
+3. Confidence level (0-1)
+4. Detailed reasoning that addresses:
+   - Which Yartseva filters this stock passes/fails
+   - Whether fundamentals support multibagger potential
+   - Whether current timing is good for entry
+   - Key risks and catalysts
+"""
+
 
 class ClaudeTrader:
     """Uses Claude API to analyze market data and make trading decisions"""
@@ -67,9 +129,12 @@ class ClaudeTrader:
             "positions": position_data,
         }
 
-    def _get_market_data_context(self, symbol: str, days: int = 30) -> Optional[Dict]:
+    def _get_market_data_context(
+        self, symbol: str, days: int = 30, stock: Optional[Stock] = None
+    ) -> Optional[Dict]:
         """Get market data and technical indicators for a stock"""
-        stock = self.db.query(Stock).filter(Stock.symbol == symbol).first()
+        if stock is None:
+            stock = self.db.query(Stock).filter(Stock.symbol == symbol).first()
         if not stock:
             return None
 
@@ -130,7 +195,9 @@ class ClaudeTrader:
         """Get sentiment analysis for a stock"""
         return self.reddit_scraper.get_stock_sentiment_summary(self.db, symbol, days)
 
-    def _get_fundamental_context(self, symbol: str) -> Optional[Dict]:
+    def _get_fundamental_context(
+        self, symbol: str, stock: Optional[Stock] = None
+    ) -> Optional[Dict]:
         """Get fundamental data for multibagger screening (Yartseva's metrics)
 
         Returns the latest quarterly fundamental data including:
@@ -139,7 +206,8 @@ class ClaudeTrader:
         - ROA - profitability
         - Reinvestment quality flags
         """
-        stock = self.db.query(Stock).filter(Stock.symbol == symbol).first()
+        if stock is None:
+            stock = self.db.query(Stock).filter(Stock.symbol == symbol).first()
         if not stock:
             return None
 
@@ -154,21 +222,29 @@ class ClaudeTrader:
         if not fundamentals:
             return None
 
-        # Calculate 52-week high/low for context
+        # Calculate 52-week high/low for context (aggregated in the database
+        # rather than loading a year of daily rows)
         one_year_ago = datetime.now() - timedelta(days=365)
-        market_data = (
-            self.db.query(MarketDataDaily)
+        latest_close = (
+            select(MarketDataDaily.close)
+            .where(MarketDataDaily.stock_id == stock.id)
+            .order_by(desc(MarketDataDaily.date))
+            .limit(1)
+            .scalar_subquery()
+        )
+        high_52w, low_52w, current_price = (
+            self.db.query(
+                func.max(MarketDataDaily.high),
+                func.min(MarketDataDaily.low),
+                latest_close,
+            )
             .filter(
                 MarketDataDaily.stock_id == stock.id,
                 MarketDataDaily.date >= one_year_ago.date()
             )
-            .all()
+            .one()
         )
 
-        high_52w = max(md.high for md in market_data) if market_data else None
-        low_52w = min(md.low for md in market_data) if market_data else None
-        current_price = market_data[-1].close if market_data else None
-
         distance_from_low = None
         if current_price and low_52w and low_52w > 0:
             distance_from_low = ((current_price - low_52w) / low_52w) * 100
@@ -226,28 +302,19 @@ class ClaudeTrader:
             "small_cap": fundamentals.market_cap and 300_000_000 <= fundamentals.market_cap <= 2_000_000_000,
         }
 
-    def _build_analysis_prompt(self, symbol: str) -> str:
-        """Build prompt for Claude with all relevant context"""
+    def _build_analysis_prompt(self, symbol: str, stock: Optional[Stock] = None) -> str:
+        """Build prompt for Claude with all relevant context
+
+        Args:
+            symbol: Stock symbol
+            stock: Already-loaded Stock for symbol (skips repeated lookups)
+        """
         portfolio = self._get_portfolio_context()
-        market_data = self._get_market_data_context(symbol)
+        market_data = self._get_market_data_context(symbol, stock=stock)
         sentiment = self._get_sentiment_context(symbol)
-        fundamentals = self._get_fundamental_context(symbol)
-
-        prompt = f"""You are an AI trading assistant using a HYBRID FUNDAMENTAL + TECHNICAL approach for multibagger stock discovery.
-
-Your analysis is based on peer-reviewed research: "The Alchemy of Multibagger Stocks" (Yartseva, 2025) which analyzed 464 stocks that achieved 10x+ returns from 2009-2024.
-
-KEY RESEARCH FINDINGS (Yartseva 2025):
-1. FCF/Price (free cash flow yield) - STRONGEST PREDICTOR (regression coefficients 46-82)
-2. Book-to-Market ratio > 0.40 + positive profitability
-3. Small caps ($300M-$2B) outperform large caps (median starting cap $348M)
-4. Reinvestment quality: Asset growth ≤ EBITDA growth (growth > EBITDA is NEGATIVE signal)
-5. Entry timing: Stocks near 12-month lows with NEGATIVE 3-6 month momentum (mean reversion)
-6. AVOID: Negative equity, high P/E without cash flow
+        fundamentals = self._get_fundamental_context(symbol, stock=stock)
 
-NOTE: This is ANALYSIS-ONLY mode. You will provide recommendations but NOT execute trades. The trader will review and execute manually.
-
-PORTFOLIO STATUS:
+        prompt = f"""PORTFOLIO STATUS:
 - Total Value: ${portfolio['total_value']:,.2f}
 - Cash Available: ${portfolio['cash_balance']:,.2f}
 - Current Positions: {portfolio['num_positions']}
@@ -319,48 +386,6 @@ FUNDAMENTAL ANALYSIS for {symbol}:
 - Average Sentiment: {sentiment['avg_sentiment']:.3f} (-1 to 1 scale)
 - Bullish Ratio: {sentiment['bullish_ratio']:.1%}
 
-TRADING PARAMETERS:
-- Position Size: 15-25% of portfolio (aggressive)
-- Required Stop Loss: 5%
-- Min Risk/Reward: 2:1
-- Max Open Positions: 10
-
-DECISION FRAMEWORK (Hybrid Fundamental + Technical):
-
-STEP 1 - FUNDAMENTAL SCREENING (Yartseva's multibagger criteria):
-  - PRIORITY 1: High FCF/Price (≥5%) - This is the STRONGEST predictor
-  - PRIORITY 2: Book/Market > 0.40 with profitability
-  - PRIORITY 3: Small cap ($300M-$2B)
-  - PRIORITY 4: Good reinvestment quality (Asset growth ≤ EBITDA growth)
-  - RED FLAG: Negative equity (automatic disqualifier)
-
-STEP 2 - ENTRY TIMING (Technical signals):
-  - BEST: Stock near 52-week lows (Yartseva: buy near lows for mean reversion)
-  - BEST: Negative 3-6 month momentum (contrary to typical trend following)
-  - GOOD: RSI oversold (<30) or neutral (30-70)
-  - GOOD: Positive sentiment shift
-  - AVOID: Near 52-week highs with momentum exhaustion
-
-STEP 3 - DECISION LOGIC:
-  - STRONG BUY: Passes 4+ Yartseva filters + good entry timing
-  - BUY: Passes 3+ filters + acceptable timing
-  - HOLD: Passes 2-3 filters but poor timing OR existing position still valid
-  - SELL/CLOSE: Fails key filters (negative equity, low FCF) OR stop loss triggered
-
-Based on this analysis, provide a trading decision:
-1. Should I BUY, SELL, HOLD, or CLOSE an existing position?
-2. If buying, suggest:
-   - Number of shares (respecting position size limits)
-   - Entry price (limit order or market)
-   - Stop loss price (5% default)
-   - Take profit target (for 2:1 risk/reward, but multibaggers may take years)
-3. Confidence level (0-1)
-4. Detailed reasoning that addresses:
-   - Which Yartseva filters this stock passes/fails
-   - Whether fundamentals support multibagger potential
-   - Whether current timing is good for entry
-   - Key risks and catalysts
-
 Format your response as JSON:
 {{
     "decision": "buy|sell|hold|close_position",
@@ -381,6 +406,47 @@ Format your response as JSON:
 
         return prompt
 
+    def _complete(self, prompt: str) -> str:
+        """Get Claude's response to an analysis prompt
+
+        The prompt captures every input to the decision (portfolio, market
+        data, sentiment, fundamentals), so users whose prompts are identical
+        (e.g. same empty portfolio) share one response for
+        CLAUDE_ANALYSIS_CACHE_TTL seconds. Each user still gets their own
+        TradingDecision record.
+        """
+        cache_key = "analysis:" + hashlib.sha256(
+            f"{settings.CLAUDE_MODEL}\n{ANALYSIS_SYSTEM_PROMPT}\n{prompt}".encode()
+        ).hexdigest()
+
+        try:
+            cached = get_redis().get(cache_key)
+            if cached:
+                return cached
+        except Exception as e:
+            print(f"Error reading cached analysis: {e}")
+
+        message = self.client.messages.create(
+            model=settings.CLAUDE_MODEL,
+            max_tokens=settings.CLAUDE_MAX_TOKENS,
+            system=[
+                {
+                    "type": "text",
+                    "text": ANALYSIS_SYSTEM_PROMPT,
+                    "cache_control": {"type": "ephemeral"},
+                }
+            ],
+            messages=[{"role": "user", "content": prompt}],
+        )
+        response_text = message.content[0].text
+
+        try:
+            get_redis().set(cache_key, response_text, ex=settings.CLAUDE_ANALYSIS_CACHE_TTL)
+        except Exception as e:
+            print(f"Error caching analysis: {e}")
+
+        return response_text
+
     def analyze_symbol(self, symbol: str) -> TradingDecision:
         """Analyze a symbol and make a trading decision
 
@@ -398,17 +464,11 @@ Format your response as JSON:
             self.db.flush()
 
         # Build analysis prompt
-        prompt = self._build_analysis_prompt(symbol)
+        prompt = self._build_analysis_prompt(symbol, stock=stock)
 
         # Call Claude API
         try:
-            message = self.client.messages.create(
-                model=settings.CLAUDE_MODEL,
-                max_tokens=settings.CLAUDE_MAX_TOKENS,
-                messages=[{"role": "user", "content": prompt}],
-            )
-
-            response_text = message.content[0].text
+            response_text = self._complete(prompt)
 
             # Parse JSON response
             import json
@@ -0,0 +1,96 @@
+"""
+Parallel symbol analysis
+
+Symbol analysis is network-bound (Claude API), so bulk passes run on a
+small thread pool. SQLAlchemy sessions are not thread-safe: each worker
+thread gets its own session and ClaudeTrader, and a shared RateLimiter
+keeps the pool within the Claude requests-per-minute budget.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models.user import User
+from .claude_trader import ClaudeTrader
+
+settings = get_settings()
+
+
+class RateLimiter:
+    """Thread-safe limiter that spaces calls evenly at a per-minute rate"""
+
+    def __init__(self, calls_per_minute: int):
+        self.interval = 60.0 / calls_per_minute
+        self._lock = threading.Lock()
+        self._next_slot = time.monotonic()
+
+    def acquire(self) -> None:
+        """Block until the caller's reserved slot comes up"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + self.interval
+
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def analyze_symbols_parallel(
+    user_id: int,
+    symbols: List[str],
+    max_workers: Optional[int] = None,
+    calls_per_minute: Optional[int] = None,
+) -> Dict[str, Dict]:
+    """Analyze many symbols for a user on a bounded thread pool
+
+    Args:
+        user_id: User ID to analyze for
+        symbols: Stock symbols to analyze
+        max_workers: Concurrent analyses (default CLAUDE_ANALYSIS_WORKERS)
+        calls_per_minute: Claude request budget (default CLAUDE_REQUESTS_PER_MINUTE)
+
+    Returns:
+        Dictionary mapping symbol to a decision summary (decision, confidence,
+        action_taken, reasoning), or {"error": message} if the analysis raised
+    """
+    limiter = RateLimiter(calls_per_minute or settings.CLAUDE_REQUESTS_PER_MINUTE)
+    local = threading.local()
+    sessions = []
+    sessions_lock = threading.Lock()
+
+    def get_trader() -> ClaudeTrader:
+        if not hasattr(local, "trader"):
+            db = SessionLocal()
+            with sessions_lock:
+                sessions.append(db)
+            user = db.query(User).filter(User.id == user_id).first()
+            local.trader = ClaudeTrader(db, user)
+        return local.trader
+
+    def analyze(symbol: str) -> Dict:
+        trader = get_trader()
+        limiter.acquire()
+        try:
+            decision = trader.analyze_symbol(symbol)
+            return {
+                "decision": decision.decision,
+                "confidence": decision.confidence,
+                "action_taken": decision.action_taken,
+                "reasoning": decision.reasoning,
+            }
+        except Exception as e:
+            trader.db.rollback()
+            return {"error": str(e)}
+
+    try:
+        with ThreadPoolExecutor(
+            max_workers=max_workers or settings.CLAUDE_ANALYSIS_WORKERS
+        ) as pool:
+            return dict(zip(symbols, pool.map(analyze, symbols)))
+    finally:
+        for db in sessions:
+            db.close()
@@ -1,22 +1,124 @@
+import hashlib
+import orjson
+import random
 import requests
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import pandas as pd
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 from sqlalchemy.orm import Session
 from app.config import get_settings
+from app.redis_client import get_redis
 from app.models.stock import Stock, MarketDataDaily
 from app.models.fundamentals import FundamentalDataQuarterly, FundamentalDataAnnual
 from .indicators import TechnicalIndicators
+from . import throttle
+from .price_events import publish_price, get_cached_price, get_cached_prices
 
 settings = get_settings()
 
+# REALTIME_BULK_QUOTES accepts at most 100 symbols per request
+BULK_QUOTES_MAX_SYMBOLS = 100
+
+# (connect, read) timeouts in seconds, so a stalled call fails fast and is
+# retried instead of hanging a worker
+REQUEST_TIMEOUT = (3.05, 10)
+
+# Retries for per-minute rate limit notes, with backoff capped in seconds
+RATE_LIMIT_RETRIES = 4
+RATE_LIMIT_MAX_BACKOFF = 60
+
+
+def _is_rate_limited(response: requests.Response) -> bool:
+    """Whether a response is Alpha Vantage's per-minute rate limit note
+
+    The note is a tiny JSON body, so check the raw bytes instead of
+    parsing every (possibly large) response twice.
+    """
+    content = response.content
+    return len(content) < 1024 and b'"Note"' in content
+
+
+@lru_cache()
+def _get_http_session() -> requests.Session:
+    """Process-wide HTTP session so every service instance reuses connections"""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=8,
+        pool_maxsize=16,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+        ),
+    )
+    session.mount("https://", adapter)
+    return session
+
+
+@lru_cache()
+def _get_fetch_pool() -> ThreadPoolExecutor:
+    """Process-wide thread pool for overlapping independent API requests"""
+    return ThreadPoolExecutor(
+        max_workers=settings.ALPHA_VANTAGE_WORKERS,
+        thread_name_prefix="alphavantage",
+    )
+
 
 class AlphaVantageService:
     """Service for fetching and storing market data from Alpha Vantage"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        rate_limit: Optional[int] = None,
+        session: Optional[requests.Session] = None,
+        max_wait: Optional[float] = None,
+    ):
+        """
+        Args:
+            rate_limit: Calls per minute this instance may make under the
+                shared per-key budget (default ALPHA_VANTAGE_RATE_LIMIT)
+            session: HTTP session to send requests through (default the
+                process-wide pooled session)
+            max_wait: Longest a call may wait for the rate limit, in
+                seconds. Set by interactive callers so they fail fast with
+                throttle.ThrottleTimeout; rate limit notes are then not
+                retried either. Default waits as long as needed (tasks).
+        """
         self.api_key = settings.ALPHA_VANTAGE_API_KEY
         self.base_url = "https://www.alphavantage.co/query"
+        self.rate_limit = rate_limit or settings.ALPHA_VANTAGE_RATE_LIMIT
+        self.session = session or _get_http_session()
+        self.max_wait = max_wait
+        # Rate limit budget is per API key; never put the key itself in Redis
+        key_id = hashlib.sha256(self.api_key.encode()).hexdigest()[:12]
+        self.throttle_name = f"alphavantage:{key_id}"
+
+    def _get(self, params: Dict) -> requests.Response:
+        """GET the Alpha Vantage API within the shared per-key rate limit
+
+        A per-minute rate limit note (returned with HTTP 200, so the
+        session's status retries don't see it) is retried with jittered
+        exponential backoff before the response is handed back, unless
+        max_wait is set.
+        """
+        retries = RATE_LIMIT_RETRIES if self.max_wait is None else 0
+
+        for attempt in range(retries + 1):
+            throttle.acquire(self.throttle_name, self.rate_limit, timeout=self.max_wait)
+            response = self.session.get(
+                self.base_url, params=params, timeout=REQUEST_TIMEOUT
+            )
+
+            if attempt == retries or not _is_rate_limited(response):
+                return response
+            delay = min(2 ** attempt, RATE_LIMIT_MAX_BACKOFF) + random.uniform(0, 1)
+            print(f"Alpha Vantage rate limit hit, retrying in {delay:.1f}s")
+            time.sleep(delay)
 
     def fetch_daily_data(
         self, symbol: str, outputsize: str = "compact"
@@ -35,9 +137,9 @@ class AlphaVantageService:
         }
 
         try:
-            response = requests.get(self.base_url, params=params)
+            response = self._get(params)
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
 
             if "Time Series (Daily)" not in data:
                 print(f"No data found for {symbol}: {data}")
@@ -116,8 +218,13 @@ class AlphaVantageService:
                 db.add(market_data)
                 new_records += 1
 
+        stock.last_price = float(df["close"].iloc[-1])
         db.commit()
         print(f"Updated {stock.symbol}: {new_records} new records")
+
+        # The daily close may be a previous session's, so it is not
+        # published to the price event stream: the stop-loss monitor only
+        # acts on live quotes
         return True
 
     def update_multiple_stocks(self, db: Session, symbols: List[str]) -> Dict[str, bool]:
@@ -141,19 +248,26 @@ class AlphaVantageService:
                 db.add(stock)
                 db.flush()
 
-            # Update data
+            # Update data (rate limited by the shared throttle)
             success = self.update_stock_data(db, stock)
             results[symbol] = success
 
-            # Rate limiting (5 calls per minute for free tier)
-            import time
-
-            time.sleep(12)  # 12 seconds between calls
-
         return results
 
     def get_latest_price(self, symbol: str) -> Optional[float]:
-        """Get latest price for a symbol using GLOBAL_QUOTE"""
+        """Get latest price for a symbol
+
+        Reads the Redis quote cache filled by market data ingestion first
+        and only calls GLOBAL_QUOTE on a miss. A fetched quote is published
+        to the price event stream.
+        """
+        try:
+            cached = get_cached_price(symbol)
+            if cached is not None:
+                return cached
+        except Exception as e:
+            print(f"Error reading cached price for {symbol}: {e}")
+
         params = {
             "function": "GLOBAL_QUOTE",
             "symbol": symbol,
@@ -161,22 +275,128 @@ class AlphaVantageService:
         }
 
         try:
-            response = requests.get(self.base_url, params=params)
+            response = self._get(params)
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
 
             if "Global Quote" in data and "05. price" in data["Global Quote"]:
-                return float(data["Global Quote"]["05. price"])
+                price = float(data["Global Quote"]["05. price"])
+                try:
+                    publish_price(symbol, price)
+                except Exception as e:
+                    print(f"Error publishing price for {symbol}: {e}")
+                return price
             return None
+        except throttle.ThrottleTimeout:
+            raise
         except Exception as e:
             print(f"Error fetching price for {symbol}: {e}")
             return None
 
-    def fetch_company_overview(self, symbol: str) -> Optional[Dict]:
+    def get_latest_prices(self, symbols: List[str]) -> Dict[str, float]:
+        """Get latest prices for many symbols
+
+        Cached quotes are read in one Redis round trip. Misses are fetched
+        with REALTIME_BULK_QUOTES when ALPHA_VANTAGE_BULK_QUOTES is enabled,
+        otherwise one GLOBAL_QUOTE call per missing symbol.
+
+        Args:
+            symbols: Stock symbols to price (duplicates are fetched once)
+
+        Returns:
+            Dictionary mapping symbol to price. Symbols without a price are omitted.
+        """
+        symbols = list(dict.fromkeys(symbols))
+
+        try:
+            prices = get_cached_prices(symbols)
+        except Exception as e:
+            print(f"Error reading cached prices: {e}")
+            prices = {}
+
+        missing = [symbol for symbol in symbols if symbol not in prices]
+        if not missing:
+            return prices
+
+        if settings.ALPHA_VANTAGE_BULK_QUOTES:
+            for symbol, quote in self.get_bulk_quotes(missing).items():
+                try:
+                    prices[symbol] = float(quote["close"])
+                except (KeyError, TypeError, ValueError):
+                    continue
+                try:
+                    publish_price(symbol, prices[symbol])
+                except Exception as e:
+                    print(f"Error publishing price for {symbol}: {e}")
+        else:
+            for symbol in missing:
+                price = self.get_latest_price(symbol)
+                if price:
+                    prices[symbol] = price
+
+        return prices
+
+    def get_bulk_quotes(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Get latest quotes for many symbols using REALTIME_BULK_QUOTES
+
+        Requires a premium Alpha Vantage key. Symbols are requested in
+        chunks of 100 (the endpoint's maximum), so N symbols cost
+        ceil(N / 100) API calls instead of N.
+
+        Args:
+            symbols: Stock symbols to quote
+
+        Returns:
+            Dictionary mapping symbol to its raw quote (open, high, low,
+            close, volume, timestamp, ...). Symbols without a quote are omitted.
+        """
+        quotes = {}
+
+        for i in range(0, len(symbols), BULK_QUOTES_MAX_SYMBOLS):
+            chunk = symbols[i:i + BULK_QUOTES_MAX_SYMBOLS]
+            params = {
+                "function": "REALTIME_BULK_QUOTES",
+                "symbol": ",".join(chunk),
+                "apikey": self.api_key,
+            }
+
+            try:
+                response = self._get(params)
+                response.raise_for_status()
+                data = orjson.loads(response.content)
+
+                if "data" not in data:
+                    print(f"No bulk quote data for {len(chunk)} symbols: {data}")
+                    continue
+
+                for quote in data["data"]:
+                    if quote.get("symbol"):
+                        quotes[quote["symbol"]] = quote
+            except Exception as e:
+                print(f"Error fetching bulk quotes: {e}")
+
+        return quotes
+
+    def fetch_company_overview(self, symbol: str, force: bool = False) -> Optional[Dict]:
         """Fetch company overview and key fundamental ratios
 
         This includes market cap, book value, P/E, P/B, and other overview metrics.
+        Responses are cached in Redis for ALPHA_VANTAGE_OVERVIEW_CACHE_TTL so
+        discovery, review and fundamentals updates share one call per symbol.
+
+        Args:
+            symbol: Stock symbol
+            force: Bypass the cache and fetch from the API
         """
+        cache_key = f"av:overview:{symbol}"
+        if not force:
+            try:
+                cached = get_redis().get(cache_key)
+                if cached:
+                    return orjson.loads(cached)
+            except Exception as e:
+                print(f"Error reading cached overview for {symbol}: {e}")
+
         params = {
             "function": "OVERVIEW",
             "symbol": symbol,
@@ -184,85 +404,93 @@ class AlphaVantageService:
         }
 
         try:
-            response = requests.get(self.base_url, params=params)
+            response = self._get(params)
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
 
             # Check if we got valid data (not rate limited or error)
             if not data or "Symbol" not in data:
                 print(f"No overview data for {symbol}: {data}")
                 return None
 
+            try:
+                get_redis().set(
+                    cache_key,
+                    orjson.dumps(data),
+                    ex=settings.ALPHA_VANTAGE_OVERVIEW_CACHE_TTL,
+                )
+            except Exception as e:
+                print(f"Error caching overview for {symbol}: {e}")
+
             return data
         except Exception as e:
             print(f"Error fetching overview for {symbol}: {e}")
             return None
 
-    def fetch_income_statement(self, symbol: str) -> Optional[Dict]:
-        """Fetch quarterly and annual income statement data"""
-        params = {
-            "function": "INCOME_STATEMENT",
-            "symbol": symbol,
-            "apikey": self.api_key,
-        }
-
-        try:
-            response = requests.get(self.base_url, params=params)
-            response.raise_for_status()
-            data = response.json()
+    def _fetch_statement(
+        self, function: str, symbol: str, label: str, force: bool = False
+    ) -> Optional[Dict]:
+        """Fetch a quarterly/annual financial statement
 
-            if "quarterlyReports" not in data and "annualReports" not in data:
-                print(f"No income statement for {symbol}")
-                return None
+        Statements only change when a company reports, so responses are
+        cached in Redis for ALPHA_VANTAGE_STATEMENT_CACHE_TTL and repeated
+        fundamentals runs cost one call per symbol and statement per day.
 
-            return data
-        except Exception as e:
-            print(f"Error fetching income statement for {symbol}: {e}")
-            return None
+        Args:
+            function: Alpha Vantage function (e.g. "INCOME_STATEMENT")
+            symbol: Stock symbol
+            label: Statement name for log messages
+            force: Bypass the cache and fetch from the API
+        """
+        cache_key = f"av:{function.lower()}:{symbol}"
+        if not force:
+            try:
+                cached = get_redis().get(cache_key)
+                if cached:
+                    return orjson.loads(cached)
+            except Exception as e:
+                print(f"Error reading cached {label} for {symbol}: {e}")
 
-    def fetch_balance_sheet(self, symbol: str) -> Optional[Dict]:
-        """Fetch quarterly and annual balance sheet data"""
         params = {
-            "function": "BALANCE_SHEET",
+            "function": function,
             "symbol": symbol,
             "apikey": self.api_key,
         }
 
         try:
-            response = requests.get(self.base_url, params=params)
+            response = self._get(params)
             response.raise_for_status()
-            data = response.json()
+            data = orjson.loads(response.content)
 
             if "quarterlyReports" not in data and "annualReports" not in data:
-                print(f"No balance sheet for {symbol}")
+                print(f"No {label} for {symbol}")
                 return None
 
+            try:
+                get_redis().set(
+                    cache_key,
+                    orjson.dumps(data),
+                    ex=settings.ALPHA_VANTAGE_STATEMENT_CACHE_TTL,
+                )
+            except Exception as e:
+                print(f"Error caching {label} for {symbol}: {e}")
+
             return data
         except Exception as e:
-            print(f"Error fetching balance sheet for {symbol}: {e}")
+            print(f"Error fetching {label} for {symbol}: {e}")
             return None
 
-    def fetch_cash_flow(self, symbol: str) -> Optional[Dict]:
-        """Fetch quarterly and annual cash flow data"""
-        params = {
-            "function": "CASH_FLOW",
-            "symbol": symbol,
-            "apikey": self.api_key,
-        }
-
-        try:
-            response = requests.get(self.base_url, params=params)
-            response.raise_for_status()
-            data = response.json()
+    def fetch_income_statement(self, symbol: str, force: bool = False) -> Optional[Dict]:
+        """Fetch quarterly and annual income statement data"""
+        return self._fetch_statement("INCOME_STATEMENT", symbol, "income statement", force)
 
-            if "quarterlyReports" not in data and "annualReports" not in data:
-                print(f"No cash flow for {symbol}")
-                return None
+    def fetch_balance_sheet(self, symbol: str, force: bool = False) -> Optional[Dict]:
+        """Fetch quarterly and annual balance sheet data"""
+        return self._fetch_statement("BALANCE_SHEET", symbol, "balance sheet", force)
 
-            return data
-        except Exception as e:
-            print(f"Error fetching cash flow for {symbol}: {e}")
-            return None
+    def fetch_cash_flow(self, symbol: str, force: bool = False) -> Optional[Dict]:
+        """Fetch quarterly and annual cash flow data"""
+        return self._fetch_statement("CASH_FLOW", symbol, "cash flow", force)
 
     def _safe_float(self, value: any) -> Optional[float]:
         """Safely convert value to float, return None if invalid"""
@@ -377,22 +605,23 @@ class AlphaVantageService:
         Returns:
             True if successful, False otherwise
         """
-        import time
-
         print(f"Fetching fundamental data for {stock.symbol}...")
 
-        # Fetch all fundamental data types
-        # Note: Alpha Vantage rate limit is 5 calls/min for free tier
-        overview = self.fetch_company_overview(stock.symbol)
-        time.sleep(13)  # Rate limiting
-
-        income_stmt = self.fetch_income_statement(stock.symbol)
-        time.sleep(13)
-
-        balance_sheet = self.fetch_balance_sheet(stock.symbol)
-        time.sleep(13)
-
-        cash_flow = self.fetch_cash_flow(stock.symbol)
+        # Fetch all fundamental data types concurrently
+        # Note: each call still waits on the shared Alpha Vantage throttle
+        pool = _get_fetch_pool()
+        futures = [
+            pool.submit(fetch, stock.symbol)
+            for fetch in (
+                self.fetch_company_overview,
+                self.fetch_income_statement,
+                self.fetch_balance_sheet,
+                self.fetch_cash_flow,
+            )
+        ]
+        overview, income_stmt, balance_sheet, cash_flow = [
+            future.result() for future in futures
+        ]
 
         if not all([overview, income_stmt, balance_sheet, cash_flow]):
             print(f"Failed to fetch complete fundamental data for {stock.symbol}")
@@ -410,7 +639,7 @@ class AlphaVantageService:
         )
 
         # Process quarterly reports
-        new_records = 0
+        payload = []
         quarterly_reports = income_stmt.get("quarterlyReports", [])[:max_quarters]
 
         for i, income_q in enumerate(quarterly_reports):
@@ -447,8 +676,8 @@ class AlphaVantageService:
                 overview, income_q, balance_q, cash_q, market_cap
             )
 
-            # Create fundamental data record
-            fundamental = FundamentalDataQuarterly(
+            # Collect fundamental data row for a single bulk insert
+            payload.append(dict(
                 stock_id=stock.id,
                 fiscal_date=fiscal_date,
                 market_cap=market_cap,
@@ -484,13 +713,19 @@ class AlphaVantageService:
                 # Quality flags
                 has_negative_equity=derived["has_negative_equity"],
                 is_profitable=derived["is_profitable"],
-            )
-
-            db.add(fundamental)
-            new_records += 1
-
-        # Calculate growth rates (requires at least 2 quarters)
-        if new_records > 0:
+            ))
+
+        new_records = len(payload)
+        if payload:
+            # Savepoint so a bad batch doesn't poison the outer transaction
+            try:
+                with db.begin_nested():
+                    db.bulk_insert_mappings(FundamentalDataQuarterly, payload)
+            except Exception as e:
+                print(f"Error storing fundamental data for {stock.symbol}: {e}")
+                return False
+
+            # Calculate growth rates (requires at least 2 quarters)
             self._calculate_quarterly_growth_rates(db, stock)
 
         db.commit()
@@ -507,7 +742,14 @@ class AlphaVantageService:
         """
         # Get all quarterly data for this stock, ordered by date
         quarters = (
-            db.query(FundamentalDataQuarterly)
+            db.query(
+                FundamentalDataQuarterly.id,
+                FundamentalDataQuarterly.total_assets,
+                FundamentalDataQuarterly.ebitda,
+                FundamentalDataQuarterly.revenue,
+                FundamentalDataQuarterly.asset_growth_rate,
+                FundamentalDataQuarterly.ebitda_growth_rate,
+            )
             .filter(FundamentalDataQuarterly.stock_id == stock.id)
             .order_by(FundamentalDataQuarterly.fiscal_date.desc())
             .all()
@@ -517,38 +759,49 @@ class AlphaVantageService:
             return
 
         # Calculate YoY growth (compare to 4 quarters ago)
+        updates = []
         for i, current_q in enumerate(quarters):
             # Look for quarter 4 periods ago (1 year)
             if i + 4 < len(quarters):
                 prior_q = quarters[i + 4]
+                update = {
+                    "id": current_q.id,
+                    "asset_growth_rate": current_q.asset_growth_rate,
+                    "ebitda_growth_rate": current_q.ebitda_growth_rate,
+                }
 
                 # Asset growth
                 if current_q.total_assets and prior_q.total_assets and prior_q.total_assets > 0:
-                    current_q.asset_growth_rate = (
+                    update["asset_growth_rate"] = (
                         (current_q.total_assets - prior_q.total_assets)
                         / prior_q.total_assets
                     )
 
                 # EBITDA growth
                 if current_q.ebitda and prior_q.ebitda and prior_q.ebitda > 0:
-                    current_q.ebitda_growth_rate = (
+                    update["ebitda_growth_rate"] = (
                         (current_q.ebitda - prior_q.ebitda) / prior_q.ebitda
                     )
 
                 # Revenue growth
                 if current_q.revenue and prior_q.revenue and prior_q.revenue > 0:
-                    current_q.revenue_growth_rate = (
+                    update["revenue_growth_rate"] = (
                         (current_q.revenue - prior_q.revenue) / prior_q.revenue
                     )
 
                 # Reinvestment quality flag: True if asset_growth <= ebitda_growth
                 # Yartseva's finding: Asset growth > EBITDA growth is a NEGATIVE signal
                 if (
-                    current_q.asset_growth_rate is not None
-                    and current_q.ebitda_growth_rate is not None
+                    update["asset_growth_rate"] is not None
+                    and update["ebitda_growth_rate"] is not None
                 ):
-                    current_q.reinvestment_quality_flag = (
-                        current_q.asset_growth_rate <= current_q.ebitda_growth_rate
+                    update["reinvestment_quality_flag"] = (
+                        update["asset_growth_rate"] <= update["ebitda_growth_rate"]
                     )
 
+                updates.append(update)
+
+        if updates:
+            db.bulk_update_mappings(FundamentalDataQuarterly, updates)
+
         db.commit()
@@ -0,0 +1,133 @@
+"""
+Price event stream
+
+Market data ingestion publishes the live quote of each updated symbol
+to a Redis stream. The stop-loss monitor consumes the stream through a
+consumer group so that only positions in symbols that received a new
+price are loaded and evaluated.
+
+The same price is also cached under ``price:{symbol}`` for a few minutes
+so order placement can read a recent quote without calling Alpha Vantage.
+"""
+
+import redis
+from typing import Dict, List, Optional, Tuple
+
+from app.redis_client import get_redis
+
+PRICE_STREAM = "market:prices"
+PRICE_STREAM_GROUP = "stop_loss_monitor"
+PRICE_STREAM_MAXLEN = 10_000
+PRICE_CACHE_TTL = 300  # seconds
+# Events pending this long on another consumer are taken over
+PRICE_PENDING_IDLE_MS = 5 * 60 * 1000
+
+
+def _price_key(symbol: str) -> str:
+    return f"price:{symbol}"
+
+
+def publish_price(symbol: str, price: float) -> None:
+    """Publish a new live quote for a symbol and cache it as the latest quote
+
+    Only publish live quotes (GLOBAL_QUOTE / bulk quotes): the stop-loss
+    monitor places orders on the prices it reads from the stream.
+
+    Args:
+        symbol: Stock symbol
+        price: New price
+    """
+    pipe = get_redis().pipeline(transaction=False)
+    pipe.xadd(
+        PRICE_STREAM,
+        {"symbol": symbol, "price": price},
+        maxlen=PRICE_STREAM_MAXLEN,
+        approximate=True,
+    )
+    pipe.set(_price_key(symbol), price, ex=PRICE_CACHE_TTL)
+    pipe.execute()
+
+
+def get_cached_price(symbol: str) -> Optional[float]:
+    """Get the cached latest quote for a symbol, or None if missing/expired"""
+    value = get_redis().get(_price_key(symbol))
+    return float(value) if value is not None else None
+
+
+def get_cached_prices(symbols: List[str]) -> Dict[str, float]:
+    """Get cached latest quotes for many symbols in one round trip
+
+    Returns:
+        Dictionary mapping symbol to price. Missing/expired symbols are omitted.
+    """
+    if not symbols:
+        return {}
+    values = get_redis().mget([_price_key(symbol) for symbol in symbols])
+    return {
+        symbol: float(value)
+        for symbol, value in zip(symbols, values)
+        if value is not None
+    }
+
+
+def consume_prices(consumer: str, count: int = 1000) -> Tuple[Dict[str, float], List[str]]:
+    """Read price events for the stop-loss consumer group
+
+    Events are acknowledged only after they have been processed, so a run
+    that fails before ack_prices leaves them pending. Each read therefore
+    first takes over events left pending by other consumers for longer
+    than PRICE_PENDING_IDLE_MS (e.g. a replaced worker host), then
+    re-reads this consumer's own pending events, and only then reads new
+    ones.
+
+    Args:
+        consumer: Consumer name within the group (e.g. worker hostname)
+        count: Maximum number of events to read per step
+
+    Returns:
+        (latest price per symbol, message IDs to acknowledge once processed)
+    """
+    client = get_redis()
+
+    try:
+        client.xgroup_create(PRICE_STREAM, PRICE_STREAM_GROUP, id="0", mkstream=True)
+    except redis.ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+    # Claimed events join this consumer's pending list, read just below
+    client.xautoclaim(
+        PRICE_STREAM,
+        PRICE_STREAM_GROUP,
+        consumer,
+        min_idle_time=PRICE_PENDING_IDLE_MS,
+        count=count,
+        justid=True,
+    )
+
+    pending = client.xreadgroup(
+        PRICE_STREAM_GROUP, consumer, {PRICE_STREAM: "0"}, count=count
+    )
+    new = client.xreadgroup(
+        PRICE_STREAM_GROUP, consumer, {PRICE_STREAM: ">"}, count=count
+    )
+
+    prices = {}
+    message_ids = []
+    # Pending events are older than new ones, so read them first
+    for _stream, messages in pending + new:
+        for message_id, fields in messages:
+            message_ids.append(message_id)
+            # Pending entries trimmed from the stream come back without fields
+            if not fields:
+                continue
+            # Later events overwrite earlier ones, keeping the latest price
+            prices[fields["symbol"]] = float(fields["price"])
+
+    return prices, message_ids
+
+
+def ack_prices(message_ids: List[str]) -> None:
+    """Acknowledge processed price events"""
+    if message_ids:
+        get_redis().xack(PRICE_STREAM, PRICE_STREAM_GROUP, *message_ids)
@@ -0,0 +1,125 @@
+"""
+Shared API throttle
+
+A sliding-window rate limiter kept in Redis, so every worker process and
+greenlet draws from the same budget. Callers only wait when the budget
+for the current window is exhausted, instead of sleeping a fixed delay
+after every call.
+
+When Redis is unreachable (e.g. a one-off job run without a Redis
+service), calls are paced by an in-process sliding window instead, so
+the budget still holds within that process.
+
+Background tasks wait as long as the budget requires. Interactive
+callers pass a timeout and get ThrottleTimeout instead of stalling.
+"""
+
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+import redis
+
+from app.redis_client import get_redis
+
+# Atomically drop expired entries, then either record this call (returns 0)
+# or return how many milliseconds until the oldest call leaves the window
+_ACQUIRE_SCRIPT = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local limit = tonumber(ARGV[3])
+
+redis.call('ZREMRANGEBYSCORE', key, 0, now - window)
+if redis.call('ZCARD', key) < limit then
+    redis.call('ZADD', key, now, ARGV[4])
+    redis.call('PEXPIRE', key, window)
+    return 0
+end
+
+local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+return tonumber(oldest[2]) + window - now
+"""
+
+
+class ThrottleTimeout(Exception):
+    """No call slot under the budget became available within the timeout"""
+
+
+# Fallback budgets: name -> (lock, start times of calls in the window)
+_local_budgets: Dict[str, Tuple[threading.Lock, Deque[float]]] = {}
+_local_budgets_lock = threading.Lock()
+_warned_fallback = False
+
+
+def acquire(
+    name: str, limit: int, period: float = 60.0, timeout: Optional[float] = None
+) -> None:
+    """Block until a call slot is available under the named budget
+
+    Args:
+        name: Budget name (e.g. "alphavantage:<key id>")
+        limit: Calls allowed per period
+        period: Window length in seconds
+        timeout: Longest to wait for a slot in seconds (default no limit)
+
+    Raises:
+        ThrottleTimeout: If no slot frees up within the timeout
+    """
+    global _warned_fallback
+
+    try:
+        _acquire_redis(name, limit, period, timeout)
+    except redis.RedisError as e:
+        if not _warned_fallback:
+            print(f"Redis throttle unavailable, pacing calls in-process: {e}")
+            _warned_fallback = True
+        _acquire_local(name, limit, period, timeout)
+
+
+def _check_wait(name: str, wait: float, timeout: Optional[float]) -> None:
+    """Raise ThrottleTimeout if a wait of `wait` seconds exceeds the timeout"""
+    if timeout is not None and wait > timeout:
+        raise ThrottleTimeout(
+            f"Rate limit for {name} exhausted, next call slot in {wait:.1f}s"
+        )
+
+
+def _acquire_local(name: str, limit: int, period: float, timeout: Optional[float]) -> None:
+    """In-process sliding window for when Redis is unreachable"""
+    with _local_budgets_lock:
+        budget = _local_budgets.get(name)
+        if budget is None or budget[1].maxlen != limit:
+            budget = (threading.Lock(), deque(maxlen=limit))
+            _local_budgets[name] = budget
+    lock, calls = budget
+
+    with lock:
+        if len(calls) == limit:
+            wait = calls[0] + period - time.monotonic()
+            if wait > 0:
+                _check_wait(name, wait, timeout)
+                time.sleep(wait)
+        calls.append(time.monotonic())
+
+
+def _acquire_redis(name: str, limit: int, period: float, timeout: Optional[float]) -> None:
+    """Shared sliding window kept in Redis"""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    client = get_redis()
+    script = client.register_script(_ACQUIRE_SCRIPT)
+    key = f"throttle:{name}"
+    window_ms = int(period * 1000)
+    member = uuid.uuid4().hex
+
+    while True:
+        wait_ms = script(
+            keys=[key], args=[int(time.time() * 1000), window_ms, limit, member]
+        )
+        if wait_ms <= 0:
+            return
+        if deadline is not None:
+            _check_wait(name, wait_ms / 1000, deadline - time.monotonic())
+        time.sleep(wait_ms / 1000)
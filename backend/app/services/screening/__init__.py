@@ -1,3 +1,4 @@
 from .multibagger_screener import MultibaggerScreener
+from .export import export_candidates, pop_export_paths
 
-__all__ = ["MultibaggerScreener"]
+__all__ = ["MultibaggerScreener", "export_candidates", "pop_export_paths"]
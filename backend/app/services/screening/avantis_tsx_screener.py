@@ -22,7 +22,7 @@ from typing import List, Optional, Dict, Any, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func, desc
+from sqlalchemy import and_, case, func, desc
 
 from app.models.stock import Stock
 from app.models.fundamentals import FundamentalDataQuarterly
@@ -71,6 +71,13 @@ class AvantisCandidate:
         }
 
 
+@dataclass
+class AvantisScreenResult:
+    """Statistics and top-ranked candidates from a single screening pass"""
+    stats: Dict[str, Any]
+    candidates: List[AvantisCandidate]
+
+
 class AvantisTSXScreener:
     """
     Screens TSX stocks using Avantis Investors' factor-based methodology
@@ -115,7 +122,9 @@ class AvantisTSXScreener:
         """
         Screen for Avantis-style factor candidates
 
-        Returns top stocks by factor score (value + profitability + quality)
+        Returns top stocks by factor score (value + profitability + quality).
+        Filtering, scoring, ranking and the limit all run in the database,
+        so only the returned rows are loaded.
 
         Args:
             db: Database session
@@ -125,6 +134,31 @@ class AvantisTSXScreener:
         Returns:
             List of (Stock, FundamentalDataQuarterly, score) tuples
         """
+        cash_prof = self._cash_profitability()
+        factor_score = self._factor_score(cash_prof).label("factor_score")
+
+        query = self._filtered_query(
+            db, cash_prof, Stock, FundamentalDataQuarterly, factor_score
+        )
+
+        return [
+            (stock, fundamentals, score)
+            for stock, fundamentals, score in (
+                query.order_by(desc(factor_score)).limit(limit).all()
+            )
+        ]
+
+    def _filtered_query(self, db: Session, cash_prof, *entities):
+        """Query entities for stocks passing all Avantis-style filters
+
+        Args:
+            db: Database session
+            cash_prof: Cash profitability expression from _cash_profitability()
+            entities: Models/columns to select
+
+        Returns:
+            Query over the latest quarter of each passing stock
+        """
         # Get latest fundamental data for each stock
         subquery = (
             db.query(
@@ -137,7 +171,8 @@ class AvantisTSXScreener:
 
         # Build query with Avantis-style filters
         query = (
-            db.query(Stock, FundamentalDataQuarterly)
+            db.query(*entities)
+            .select_from(Stock)
             .join(Stock.fundamental_data)
             .join(
                 subquery,
@@ -160,6 +195,7 @@ class AvantisTSXScreener:
                 # Profitability factor: Need operating cash flow data
                 FundamentalDataQuarterly.operating_cash_flow.isnot(None),
                 FundamentalDataQuarterly.total_equity.isnot(None),
+                cash_prof >= self.min_cash_profitability,
             )
         )
 
@@ -169,39 +205,22 @@ class AvantisTSXScreener:
                 FundamentalDataQuarterly.fcf_price_ratio >= self.min_fcf_price_ratio
             )
 
-        results = query.all()
-
-        # Calculate factor scores
-        scored_results = []
-        for stock, fundamentals in results:
-            # Calculate cash profitability: OCF / Book Equity
-            cash_prof = (
-                fundamentals.operating_cash_flow / fundamentals.total_equity
-                if fundamentals.total_equity and fundamentals.total_equity > 0
-                else 0
-            )
-
-            # Skip if cash profitability too low
-            if cash_prof < self.min_cash_profitability:
-                continue
-
-            # Calculate factor score
-            score = self._calculate_factor_score(fundamentals, cash_prof)
-            scored_results.append((stock, fundamentals, score))
-
-        # Sort by factor score (descending)
-        scored_results.sort(key=lambda x: x[2], reverse=True)
-
-        # Return top N
-        return scored_results[:limit]
+        return query
+
+    def _cash_profitability(self):
+        """SQL expression for cash profitability: OCF / Book Equity (0 without positive equity)"""
+        return case(
+            (
+                FundamentalDataQuarterly.total_equity > 0,
+                FundamentalDataQuarterly.operating_cash_flow
+                / FundamentalDataQuarterly.total_equity,
+            ),
+            else_=0,
+        )
 
-    def _calculate_factor_score(
-        self,
-        fundamentals: FundamentalDataQuarterly,
-        cash_profitability: float
-    ) -> float:
+    def _factor_score(self, cash_profitability):
         """
-        Calculate composite factor score (0-100)
+        SQL expression for the composite factor score (0-100)
 
         Avantis-style weighting:
         - Value (Book/Price): 40 points
@@ -209,42 +228,41 @@ class AvantisTSXScreener:
         - Quality bonuses: 20 points
 
         Args:
-            fundamentals: Fundamental data for the stock
-            cash_profitability: Calculated OCF / Book Equity
+            cash_profitability: OCF / Book Equity expression
 
         Returns:
-            Score from 0-100
+            Score expression from 0-100
         """
-        score = 0.0
+        book_to_price = func.coalesce(FundamentalDataQuarterly.book_to_market, 0)
 
         # VALUE FACTOR: Book-to-Price (40 points max)
         # Scale: 0.40 = 20 pts, 0.80+ = 40 pts
-        book_to_price = fundamentals.book_to_market or 0
-        if book_to_price >= 0.40:
-            value_score = min(40, 20 + (book_to_price - 0.40) * 50)
-            score += value_score
+        value_score = case(
+            (book_to_price >= 0.40, func.least(40, 20 + (book_to_price - 0.40) * 50)),
+            else_=0,
+        )
 
         # PROFITABILITY FACTOR: Cash ROE (40 points max)
         # Scale: 10% = 20 pts, 30%+ = 40 pts
-        if cash_profitability >= 0.10:
-            prof_score = min(40, 20 + (cash_profitability - 0.10) * 100)
-            score += prof_score
+        prof_score = case(
+            (
+                cash_profitability >= 0.10,
+                func.least(40, 20 + (cash_profitability - 0.10) * 100),
+            ),
+            else_=0,
+        )
 
         # QUALITY BONUSES (20 points)
+        quality_score = (
+            # Reinvestment quality: 10 points
+            case((FundamentalDataQuarterly.reinvestment_quality_flag == True, 10), else_=0)
+            # FCF/Price > 5%: 5 points bonus (if available)
+            + case((FundamentalDataQuarterly.fcf_price_ratio >= 0.05, 5), else_=0)
+            # Strong ROA (>10%): 5 points bonus
+            + case((FundamentalDataQuarterly.roa >= 0.10, 5), else_=0)
+        )
 
-        # Reinvestment quality: 10 points
-        if fundamentals.reinvestment_quality_flag:
-            score += 10
-
-        # FCF/Price > 5%: 5 points bonus (if available)
-        if fundamentals.fcf_price_ratio and fundamentals.fcf_price_ratio >= 0.05:
-            score += 5
-
-        # Strong ROA (>10%): 5 points bonus
-        if fundamentals.roa and fundamentals.roa >= 0.10:
-            score += 5
-
-        return score
+        return value_score + prof_score + quality_score
 
     def get_candidates(
         self,
@@ -265,33 +283,91 @@ class AvantisTSXScreener:
         """
         results = self.screen(db, limit=limit, return_scores=True)
 
-        candidates = []
-        for stock, fundamentals, score in results:
-            # Calculate cash profitability
-            cash_prof = (
-                fundamentals.operating_cash_flow / fundamentals.total_equity
-                if fundamentals.total_equity and fundamentals.total_equity > 0
-                else 0
-            )
+        return [
+            self._build_candidate(stock, fundamentals, score)
+            for stock, fundamentals, score in results
+        ]
+
+    def evaluate(self, db: Session, limit: int = 25) -> AvantisScreenResult:
+        """
+        Get screening statistics and the top candidates in one pass
+
+        The passing-set aggregates are window functions over the same
+        filtered query that ranks and limits the candidates, so the
+        filters run once instead of once for stats and once for rows.
+
+        Args:
+            db: Database session
+            limit: Maximum number of candidates (at least 1)
 
-            candidate = AvantisCandidate(
-                stock_id=stock.id,
-                symbol=stock.symbol,
-                name=stock.name,
-                sector=stock.sector or "Unknown",
-                market_cap=fundamentals.market_cap,
-                book_to_price=fundamentals.book_to_market,
-                cash_profitability=cash_prof,
-                fcf_price_ratio=fundamentals.fcf_price_ratio,
-                roa=fundamentals.roa,
-                roe=fundamentals.roe,
-                is_profitable=fundamentals.is_profitable,
-                reinvestment_quality_flag=fundamentals.reinvestment_quality_flag,
-                factor_score=score,
+        Returns:
+            AvantisScreenResult with get_statistics()-style stats and
+            get_candidates()-style candidates
+        """
+        cash_prof = self._cash_profitability()
+        factor_score = self._factor_score(cash_prof)
+        score_column = factor_score.label("factor_score")
+
+        rows = (
+            self._filtered_query(
+                db,
+                cash_prof,
+                Stock,
+                FundamentalDataQuarterly,
+                score_column,
+                func.count().over(),
+                func.avg(FundamentalDataQuarterly.book_to_market).over(),
+                func.avg(func.nullif(cash_prof, 0)).over(),
+                func.avg(func.nullif(FundamentalDataQuarterly.fcf_price_ratio, 0)).over(),
+                func.avg(factor_score).over(),
             )
-            candidates.append(candidate)
+            .order_by(desc(score_column))
+            .limit(limit)
+            .all()
+        )
+
+        if rows:
+            aggregates = rows[0][3:]
+        else:
+            aggregates = (0, 0, 0, 0, 0)
+
+        return AvantisScreenResult(
+            stats=self._build_statistics(db, *aggregates),
+            candidates=[
+                self._build_candidate(stock, fundamentals, score)
+                for stock, fundamentals, score, *_ in rows
+            ],
+        )
+
+    def _build_candidate(
+        self,
+        stock: Stock,
+        fundamentals: FundamentalDataQuarterly,
+        score: float,
+    ) -> AvantisCandidate:
+        """Convert a screened row to an AvantisCandidate"""
+        # Calculate cash profitability
+        cash_prof = (
+            fundamentals.operating_cash_flow / fundamentals.total_equity
+            if fundamentals.total_equity and fundamentals.total_equity > 0
+            else 0
+        )
 
-        return candidates
+        return AvantisCandidate(
+            stock_id=stock.id,
+            symbol=stock.symbol,
+            name=stock.name,
+            sector=stock.sector or "Unknown",
+            market_cap=fundamentals.market_cap,
+            book_to_price=fundamentals.book_to_market,
+            cash_profitability=cash_prof,
+            fcf_price_ratio=fundamentals.fcf_price_ratio,
+            roa=fundamentals.roa,
+            roe=fundamentals.roe,
+            is_profitable=fundamentals.is_profitable,
+            reinvestment_quality_flag=fundamentals.reinvestment_quality_flag,
+            factor_score=score,
+        )
 
     def get_portfolio_weights(
         self,
@@ -315,28 +391,57 @@ class AvantisTSXScreener:
         """
         results = self.screen(db, limit=num_holdings, return_scores=True)
 
-        if not results:
+        weights = self._weights(
+            [score for _, _, score in results],
+            [fund.market_cap for _, fund, _ in results],
+            weighting_method,
+        )
+        return [(stock, weight) for (stock, _, _), weight in zip(results, weights)]
+
+    def weight_candidates(
+        self,
+        candidates: List[AvantisCandidate],
+        weighting_method: str = "equal"
+    ) -> List[Tuple[AvantisCandidate, float]]:
+        """
+        Weight already-screened candidates as portfolio holdings
+
+        Same weighting as get_portfolio_weights, without screening again.
+
+        Args:
+            candidates: Candidates to hold (e.g. from evaluate())
+            weighting_method: "equal", "factor_score" or "market_cap"
+
+        Returns:
+            List of (AvantisCandidate, weight) tuples summing to 1.0
+        """
+        weights = self._weights(
+            [c.factor_score for c in candidates],
+            [c.market_cap for c in candidates],
+            weighting_method,
+        )
+        return list(zip(candidates, weights))
+
+    def _weights(
+        self,
+        scores: List[float],
+        market_caps: List[float],
+        weighting_method: str
+    ) -> List[float]:
+        """Portfolio weights for holdings with the given scores and market caps"""
+        if not scores:
             return []
 
         if weighting_method == "equal":
-            weight = 1.0 / len(results)
-            return [(stock, weight) for stock, _, _ in results]
+            return [1.0 / len(scores)] * len(scores)
 
         elif weighting_method == "factor_score":
-            scores = [score for _, _, score in results]
             total_score = sum(scores)
-            return [
-                (stock, score / total_score)
-                for stock, _, score in results
-            ]
+            return [score / total_score for score in scores]
 
         elif weighting_method == "market_cap":
-            market_caps = [fund.market_cap for _, fund, _ in results]
             total_cap = sum(market_caps)
-            return [
-                (stock, fund.market_cap / total_cap)
-                for stock, fund, _ in results
-            ]
+            return [market_cap / total_cap for market_cap in market_caps]
 
         else:
             raise ValueError(f"Unknown weighting method: {weighting_method}")
@@ -348,6 +453,33 @@ class AvantisTSXScreener:
         Returns:
             Dictionary with screening stats
         """
+        # Count and average the passing stocks in a single aggregate query
+        cash_prof = self._cash_profitability()
+        aggregates = (
+            self._filtered_query(
+                db,
+                cash_prof,
+                func.count(),
+                func.avg(FundamentalDataQuarterly.book_to_market),
+                func.avg(func.nullif(cash_prof, 0)),
+                func.avg(func.nullif(FundamentalDataQuarterly.fcf_price_ratio, 0)),
+                func.avg(self._factor_score(cash_prof)),
+            )
+            .one()
+        )
+
+        return self._build_statistics(db, *aggregates)
+
+    def _build_statistics(
+        self,
+        db: Session,
+        passing_all: int,
+        avg_book_to_price: Optional[float],
+        avg_cash_prof: Optional[float],
+        avg_fcf_price: Optional[float],
+        avg_score: Optional[float],
+    ) -> Dict[str, Any]:
+        """Assemble the statistics dict from passing-set aggregates"""
         # Get all stocks with fundamental data
         total_with_data = (
             db.query(func.count(func.distinct(FundamentalDataQuarterly.stock_id)))
@@ -356,39 +488,14 @@ class AvantisTSXScreener:
             .scalar()
         )
 
-        # Get stocks passing each filter
-        results = self.screen(db, limit=1000, return_scores=True)
-        passing_all = len(results)
-
-        if results:
-            avg_book_to_price = sum(f.book_to_market for _, f, _ in results) / len(results)
-
-            # Calculate average cash profitability
-            cash_profs = []
-            for _, f, _ in results:
-                if f.operating_cash_flow and f.total_equity and f.total_equity > 0:
-                    cash_profs.append(f.operating_cash_flow / f.total_equity)
-            avg_cash_prof = sum(cash_profs) / len(cash_profs) if cash_profs else 0
-
-            avg_fcf_price = sum(
-                f.fcf_price_ratio for _, f, _ in results if f.fcf_price_ratio
-            ) / len([f for _, f, _ in results if f.fcf_price_ratio])
-
-            avg_score = sum(s for _, _, s in results) / len(results)
-        else:
-            avg_book_to_price = 0
-            avg_cash_prof = 0
-            avg_fcf_price = 0
-            avg_score = 0
-
         return {
             "total_stocks_with_fundamentals": total_with_data,
             "passing_all_filters": passing_all,
             "pass_rate": passing_all / total_with_data if total_with_data > 0 else 0,
-            "avg_book_to_price": avg_book_to_price,
-            "avg_cash_profitability": avg_cash_prof,
-            "avg_fcf_price_ratio": avg_fcf_price,
-            "avg_factor_score": avg_score,
+            "avg_book_to_price": avg_book_to_price or 0,
+            "avg_cash_profitability": avg_cash_prof or 0,
+            "avg_fcf_price_ratio": avg_fcf_price or 0,
+            "avg_factor_score": avg_score or 0,
             "filters": {
                 "min_book_to_price": self.min_book_to_price,
                 "min_cash_profitability": self.min_cash_profitability,
@@ -0,0 +1,61 @@
+"""
+Screening result export
+
+Writes screened candidates as machine-readable files so downstream tools
+can load the raw values instead of re-parsing the printed report.
+"""
+
+import json
+import sys
+from typing import List, Optional, Tuple
+
+import pandas as pd
+
+
+def pop_export_paths(argv: List[str], usage: str) -> Tuple[Optional[str], Optional[str]]:
+    """Remove "--json FILE" and "--parquet FILE" from a screening script's argv
+
+    Exits with the usage message if a flag is missing its file path.
+
+    Args:
+        argv: Argument list to consume the options from (e.g. sys.argv)
+        usage: Usage line shown on a malformed option
+
+    Returns:
+        (json_path, parquet_path), each None when its flag is absent
+    """
+    paths = []
+    for flag in ("--json", "--parquet"):
+        path = None
+        if flag in argv:
+            i = argv.index(flag)
+            if i + 1 >= len(argv) or argv[i + 1].startswith("--"):
+                sys.exit(f"{flag} needs a file path\n{usage}")
+            path = argv[i + 1]
+            del argv[i:i + 2]
+        paths.append(path)
+    return paths[0], paths[1]
+
+
+def export_candidates(
+    candidates: List,
+    json_path: Optional[str] = None,
+    parquet_path: Optional[str] = None,
+) -> None:
+    """Write candidates to JSON and/or Parquet
+
+    Args:
+        candidates: Screening candidates (anything with to_dict())
+        json_path: Write a JSON array of candidate records here
+        parquet_path: Write a zstd-compressed Parquet file here
+    """
+    records = [candidate.to_dict() for candidate in candidates]
+
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(records, f, indent=2)
+
+    if parquet_path:
+        pd.DataFrame.from_records(records).to_parquet(
+            parquet_path, engine="pyarrow", compression="zstd", index=False
+        )
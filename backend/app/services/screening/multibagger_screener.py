@@ -14,16 +14,27 @@ Key findings from the paper:
 7. 3-6 month momentum is NEGATIVE (mean reversion, not trend following)
 """
 
-from typing import List, Optional, Dict, Any
+import heapq
+from itertools import islice
+from typing import Iterator, List, Optional, Dict, Any
 from dataclasses import dataclass
 from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc
+from sqlalchemy import and_, or_, case, func, desc, select
 
 from app.models.stock import Stock, MarketDataDaily
 from app.models.fundamentals import FundamentalDataQuarterly
 
 
+# Most points the technical timing overlay can add to a score
+MAX_TECHNICAL_SCORE = 10
+
+# Rows scored together (one price-history query per chunk)
+SCREEN_CHUNK_SIZE = 50
+
+
 @dataclass
 class MultibaggerCandidate:
     """A stock that passes multibagger screening criteria"""
@@ -139,20 +150,34 @@ class MultibaggerScreener:
         Returns:
             List of MultibaggerCandidate objects, ranked by multibagger_score
         """
-        # Get latest fundamental data for each stock
-        # We use a subquery to get the most recent quarter for each stock
-        subquery = (
-            db.query(
-                FundamentalDataQuarterly.stock_id,
-                func.max(FundamentalDataQuarterly.fiscal_date).label('max_date')
-            )
-            .group_by(FundamentalDataQuarterly.stock_id)
-            .subquery()
-        )
+        return list(self.iter_screen(db, limit=limit, include_technical=include_technical))
+
+    def iter_screen(
+        self,
+        db: Session,
+        limit: int = 20,
+        include_technical: bool = True
+    ) -> Iterator[MultibaggerCandidate]:
+        """Yield screening results in multibagger_score order as they're final
+
+        Rows are streamed from the database in fundamental score order and
+        scored SCREEN_CHUNK_SIZE at a time, with one price-history query per
+        chunk. Timing adds at most MAX_TECHNICAL_SCORE, so a scored candidate
+        is final (and yielded) once the next row's fundamental score plus
+        that bonus can't beat it. Chunks stop loading once `limit` results
+        have been yielded.
+
+        Args:
+            db: Database session
+            limit: Maximum number of results to yield
+            include_technical: Whether to include technical timing metrics
+        """
+        subquery = self._latest_quarters(db)
+        fundamental_score = self._fundamental_score().label("fundamental_score")
 
-        # Join to get full records for latest quarters
+        # Join to get full records for latest quarters, best fundamentals first
         query = (
-            db.query(Stock, FundamentalDataQuarterly)
+            db.query(Stock, FundamentalDataQuarterly, fundamental_score)
             .join(Stock.fundamental_data)
             .join(
                 subquery,
@@ -162,9 +187,115 @@ class MultibaggerScreener:
                 )
             )
             .filter(Stock.is_active == True)
+            .filter(and_(*self._fundamental_filters()))
+            .order_by(desc(fundamental_score))
         )
 
-        # Apply fundamental filters
+        # Without the technical overlay the SQL ranking is final
+        max_bonus = MAX_TECHNICAL_SCORE if include_technical else 0
+        if not include_technical:
+            query = query.limit(limit)
+
+        rows = iter(query.yield_per(SCREEN_CHUNK_SIZE))
+
+        # Max-heap (negated score, tiebreak, candidate) of scored candidates
+        # that a later row could still outrank
+        pending = []
+        emitted = 0
+        row_number = 0
+
+        while emitted < limit:
+            chunk = list(islice(rows, SCREEN_CHUNK_SIZE))
+            next_best = chunk[0][2] + max_bonus if chunk else None
+
+            while pending and emitted < limit and (
+                next_best is None or -pending[0][0] >= next_best
+            ):
+                yield heapq.heappop(pending)[2]
+                emitted += 1
+
+            if not chunk or emitted >= limit:
+                return
+
+            # Calculate technical metrics and timing scores for the chunk
+            technical = (
+                self._get_technical_metrics(db, [stock.id for stock, _, _ in chunk])
+                if include_technical
+                else pd.DataFrame(columns=["technical_score"])
+            )
+
+            for stock, fundamentals, fundamental_score in chunk:
+                technical_data = None
+                technical_score = 0.0
+                if stock.id in technical.index:
+                    row = technical.loc[stock.id]
+                    technical_score = float(row["technical_score"])
+                    technical_data = {
+                        key: (None if pd.isna(row[key]) else float(row[key]))
+                        for key in (
+                            "current_price",
+                            "distance_from_52w_high",
+                            "distance_from_52w_low",
+                            "momentum_6m",
+                        )
+                    }
+
+                # Calculate multibagger score
+                score = round(fundamental_score + technical_score, 2)
+
+                candidate = self._build_candidate(stock, fundamentals, technical_data, score)
+                heapq.heappush(pending, (-score, row_number, candidate))
+                row_number += 1
+
+    def _build_candidate(
+        self,
+        stock: Stock,
+        fundamentals: FundamentalDataQuarterly,
+        technical_data: Optional[Dict[str, float]],
+        score: float,
+    ) -> MultibaggerCandidate:
+        """Convert a screened row to a MultibaggerCandidate"""
+        return MultibaggerCandidate(
+            stock_id=stock.id,
+            symbol=stock.symbol,
+            name=stock.name,
+            sector=stock.sector or "Unknown",
+            # Fundamental metrics
+            market_cap=fundamentals.market_cap or 0,
+            fcf_price_ratio=fundamentals.fcf_price_ratio or 0,
+            book_to_market=fundamentals.book_to_market or 0,
+            roa=fundamentals.roa or 0,
+            roe=fundamentals.roe or 0,
+            ebitda_margin=fundamentals.ebitda_margin or 0,
+            # Growth metrics
+            asset_growth_rate=fundamentals.asset_growth_rate,
+            ebitda_growth_rate=fundamentals.ebitda_growth_rate,
+            revenue_growth_rate=fundamentals.revenue_growth_rate,
+            # Quality flags
+            reinvestment_quality_flag=fundamentals.reinvestment_quality_flag or False,
+            is_profitable=fundamentals.is_profitable or False,
+            # Technical metrics
+            current_price=technical_data.get("current_price") if technical_data else None,
+            distance_from_52w_high=technical_data.get("distance_from_52w_high") if technical_data else None,
+            distance_from_52w_low=technical_data.get("distance_from_52w_low") if technical_data else None,
+            momentum_6m=technical_data.get("momentum_6m") if technical_data else None,
+            # Score
+            multibagger_score=score,
+        )
+
+    def _latest_quarters(self, db: Session):
+        """Subquery of (stock_id, max_date) for each stock's most recent quarter"""
+        return (
+            db.query(
+                FundamentalDataQuarterly.stock_id,
+                func.max(FundamentalDataQuarterly.fiscal_date).label('max_date')
+            )
+            .group_by(FundamentalDataQuarterly.stock_id)
+            .subquery()
+        )
+
+    def _fundamental_filters(self) -> List:
+        """Build the fundamental filter predicates for the configured criteria"""
         filters = []
 
         # CRITICAL: FCF/Price ratio (STRONGEST PREDICTOR)
@@ -210,235 +341,213 @@ class MultibaggerScreener:
                 FundamentalDataQuarterly.reinvestment_quality_flag == True
             )
 
-        query = query.filter(and_(*filters))
-
-        results = query.all()
-
-        # Convert to MultibaggerCandidate objects with scoring
-        candidates = []
-
-        for stock, fundamentals in results:
-            # Calculate technical metrics if requested
-            technical_data = None
-            if include_technical:
-                technical_data = self._get_technical_metrics(db, stock.id)
-
-            # Calculate multibagger score
-            score = self._calculate_multibagger_score(fundamentals, technical_data)
-
-            candidate = MultibaggerCandidate(
-                stock_id=stock.id,
-                symbol=stock.symbol,
-                name=stock.name,
-                sector=stock.sector or "Unknown",
-                # Fundamental metrics
-                market_cap=fundamentals.market_cap or 0,
-                fcf_price_ratio=fundamentals.fcf_price_ratio or 0,
-                book_to_market=fundamentals.book_to_market or 0,
-                roa=fundamentals.roa or 0,
-                roe=fundamentals.roe or 0,
-                ebitda_margin=fundamentals.ebitda_margin or 0,
-                # Growth metrics
-                asset_growth_rate=fundamentals.asset_growth_rate,
-                ebitda_growth_rate=fundamentals.ebitda_growth_rate,
-                revenue_growth_rate=fundamentals.revenue_growth_rate,
-                # Quality flags
-                reinvestment_quality_flag=fundamentals.reinvestment_quality_flag or False,
-                is_profitable=fundamentals.is_profitable or False,
-                # Technical metrics
-                current_price=technical_data.get("current_price") if technical_data else None,
-                distance_from_52w_high=technical_data.get("distance_from_52w_high") if technical_data else None,
-                distance_from_52w_low=technical_data.get("distance_from_52w_low") if technical_data else None,
-                momentum_6m=technical_data.get("momentum_6m") if technical_data else None,
-                # Score
-                multibagger_score=score,
-            )
-
-            candidates.append(candidate)
-
-        # Sort by multibagger score (highest first)
-        candidates.sort(key=lambda x: x.multibagger_score, reverse=True)
-
-        return candidates[:limit]
+        return filters
 
-    def _get_technical_metrics(self, db: Session, stock_id: int) -> Optional[Dict[str, float]]:
-        """Get technical timing metrics for a stock
+    def _get_technical_metrics(self, db: Session, stock_ids: List[int]) -> pd.DataFrame:
+        """Get technical timing metrics and scores for a batch of stocks
 
-        Calculates:
+        Loads the last year of prices for all stocks in one query and
+        computes, per stock, with vectorized pandas/NumPy operations:
         - Current price
         - Distance from 52-week high/low
         - 6-month momentum (should be negative per Yartseva)
+        - technical_score: timing bonus (up to MAX_TECHNICAL_SCORE)
+
+        Returns:
+            DataFrame indexed by stock_id; stocks with fewer than two
+            prices in the last year are omitted
         """
         # Get data from last year
         one_year_ago = datetime.now() - timedelta(days=365)
+        six_months_ago = datetime.now() - timedelta(days=180)
 
-        market_data = (
-            db.query(MarketDataDaily)
-            .filter(
-                MarketDataDaily.stock_id == stock_id,
-                MarketDataDaily.date >= one_year_ago.date()
+        prices = pd.read_sql(
+            select(
+                MarketDataDaily.stock_id,
+                MarketDataDaily.date,
+                MarketDataDaily.close,
+                MarketDataDaily.high,
+                MarketDataDaily.low,
+            )
+            .where(
+                MarketDataDaily.stock_id.in_(stock_ids),
+                MarketDataDaily.date >= one_year_ago.date(),
             )
-            .order_by(MarketDataDaily.date.desc())
-            .all()
+            .order_by(MarketDataDaily.stock_id, MarketDataDaily.date),
+            db.connection(),
+            parse_dates=["date"],
         )
 
-        if not market_data or len(market_data) < 2:
-            return None
-
-        # Current price (most recent)
-        current_price = market_data[0].close
-
-        # 52-week high/low
-        high_52w = max(d.high for d in market_data)
-        low_52w = min(d.low for d in market_data)
-
-        distance_from_high = (current_price - high_52w) / high_52w
-        distance_from_low = (current_price - low_52w) / low_52w
+        by_stock = prices.groupby("stock_id")
+        metrics = pd.DataFrame({
+            "count": by_stock.size(),
+            # Current price (most recent)
+            "current_price": by_stock["close"].last(),
+            # 52-week high/low
+            "high_52w": by_stock["high"].max(),
+            "low_52w": by_stock["low"].min(),
+        })
+        # Own copy, so the columns added below don't write into a view
+        metrics = metrics.loc[metrics["count"] >= 2].copy()
+
+        metrics["distance_from_52w_high"] = (
+            (metrics["current_price"] - metrics["high_52w"]) / metrics["high_52w"]
+        )
+        metrics["distance_from_52w_low"] = (
+            (metrics["current_price"] - metrics["low_52w"]) / metrics["low_52w"]
+        )
 
         # 6-month momentum (should be negative = mean reversion opportunity)
-        six_months_ago = datetime.now() - timedelta(days=180)
-        six_month_data = [d for d in market_data if d.date >= six_months_ago.date()]
+        recent = prices[prices["date"] >= pd.Timestamp(six_months_ago.date())]
+        by_recent = recent.groupby("stock_id")
+        price_6m_ago = by_recent["close"].first().where(by_recent.size() > 1)
+        metrics["momentum_6m"] = (
+            (metrics["current_price"] - price_6m_ago) / price_6m_ago
+        )
 
-        if six_month_data and len(six_month_data) > 1:
-            price_6m_ago = six_month_data[-1].close
-            momentum_6m = (current_price - price_6m_ago) / price_6m_ago
-        else:
-            momentum_6m = None
+        # Timing bonus; NaN metrics fail every comparison and score 0
+        dist_low = metrics["distance_from_52w_low"]
+        mom_6m = metrics["momentum_6m"]
+        metrics["technical_score"] = (
+            # Near 52-week low: 0-10% above low = 5 points, 10-20% = 2.5 points
+            np.select([dist_low <= 0.10, dist_low <= 0.20], [5.0, 2.5], 0.0)
+            # Negative 6-month momentum is POSITIVE per Yartseva (mean reversion)
+            # -10% to 0% momentum = 5 points, -20% to -10% = 3 points
+            + np.select(
+                [
+                    (mom_6m >= -0.10) & (mom_6m < 0),
+                    (mom_6m >= -0.20) & (mom_6m < -0.10),
+                ],
+                [5.0, 3.0],
+                0.0,
+            )
+        )
 
-        return {
-            "current_price": current_price,
-            "distance_from_52w_high": distance_from_high,
-            "distance_from_52w_low": distance_from_low,
-            "momentum_6m": momentum_6m,
-        }
+        return metrics
 
-    def _calculate_multibagger_score(
-        self,
-        fundamentals: FundamentalDataQuarterly,
-        technical: Optional[Dict[str, float]]
-    ) -> float:
-        """Calculate composite multibagger score
+    def _fundamental_score(self):
+        """SQL expression for the fundamental part of the multibagger score
 
         Scoring based on Yartseva's regression coefficients:
         - FCF/Price: Highest weight (coefficients 46-82 in paper)
         - Book/Market: Medium weight
         - Profitability (ROA): Medium weight
         - Reinvestment quality: Bonus points
-        - Technical timing: Bonus points (near lows, negative momentum)
 
-        Score range: 0-100
+        Range: 0-90; the timing bonus from _get_technical_metrics adds up
+        to MAX_TECHNICAL_SCORE
         """
-        score = 0.0
+        fcf_price_ratio = FundamentalDataQuarterly.fcf_price_ratio
+        book_to_market = FundamentalDataQuarterly.book_to_market
+        roa = FundamentalDataQuarterly.roa
+        ebitda_margin = FundamentalDataQuarterly.ebitda_margin
 
         # FCF/Price (40 points max) - STRONGEST PREDICTOR
         # Yartseva found coefficients of 46-82, we scale proportionally
-        if fundamentals.fcf_price_ratio:
-            # Scale: 0.10 FCF yield = 20 points, 0.20 = 40 points
-            fcf_score = min(fundamentals.fcf_price_ratio * 200, 40)
-            score += fcf_score
+        # Scale: 0.10 FCF yield = 20 points, 0.20 = 40 points
+        fcf_score = case(
+            (fcf_price_ratio != 0, func.least(fcf_price_ratio * 200, 40)),
+            else_=0,
+        )
 
         # Book-to-Market (20 points max) - VALUE FACTOR
-        if fundamentals.book_to_market:
-            # Scale: 0.40 = 8 points, 1.00 = 20 points
-            bm_score = min((fundamentals.book_to_market - 0.40) * 33.3, 20)
-            score += max(bm_score, 0)
+        # Scale: 0.40 = 8 points, 1.00 = 20 points
+        bm_score = case(
+            (
+                book_to_market != 0,
+                func.greatest(func.least((book_to_market - 0.40) * 33.3, 20), 0),
+            ),
+            else_=0,
+        )
 
         # Profitability - ROA (15 points max)
-        if fundamentals.roa:
-            # Scale: 0.05 ROA = 7.5 points, 0.10 = 15 points
-            roa_score = min(fundamentals.roa * 150, 15)
-            score += max(roa_score, 0)
+        # Scale: 0.05 ROA = 7.5 points, 0.10 = 15 points
+        roa_score = case(
+            (roa != 0, func.greatest(func.least(roa * 150, 15), 0)),
+            else_=0,
+        )
 
         # Reinvestment quality (10 points bonus)
         # Yartseva: Asset growth > EBITDA growth is NEGATIVE
-        if fundamentals.reinvestment_quality_flag:
-            score += 10
+        reinvestment_score = case(
+            (FundamentalDataQuarterly.reinvestment_quality_flag == True, 10),
+            else_=0,
+        )
 
         # EBITDA margin (5 points max) - Operating efficiency
-        if fundamentals.ebitda_margin and fundamentals.ebitda_margin > 0:
-            ebitda_score = min(fundamentals.ebitda_margin * 50, 5)
-            score += ebitda_score
-
-        # Technical timing factors (10 points bonus)
-        if technical:
-            # Near 52-week low is positive (mean reversion opportunity)
-            if technical.get("distance_from_52w_low") is not None:
-                dist_low = technical["distance_from_52w_low"]
-                # 0-10% above low = 5 points, 10-20% = 2.5 points
-                if dist_low <= 0.10:
-                    score += 5
-                elif dist_low <= 0.20:
-                    score += 2.5
-
-            # Negative 6-month momentum is POSITIVE per Yartseva (mean reversion)
-            if technical.get("momentum_6m") is not None:
-                mom_6m = technical["momentum_6m"]
-                # -10% to 0% momentum = 5 points, -20% to -10% = 3 points
-                if -0.10 <= mom_6m < 0:
-                    score += 5
-                elif -0.20 <= mom_6m < -0.10:
-                    score += 3
+        ebitda_score = case(
+            (ebitda_margin > 0, func.least(ebitda_margin * 50, 5)),
+            else_=0,
+        )
 
-        return round(score, 2)
+        return fcf_score + bm_score + roa_score + reinvestment_score + ebitda_score
 
     def get_screening_stats(self, db: Session) -> Dict[str, Any]:
         """Get statistics about the screening universe
 
         Returns counts and averages to help understand the dataset
         """
-        # Total stocks with fundamental data
-        total_with_fundamentals = (
-            db.query(func.count(func.distinct(FundamentalDataQuarterly.stock_id)))
-            .scalar()
+        subquery = self._latest_quarters(db)
+        latest_join = and_(
+            FundamentalDataQuarterly.stock_id == subquery.c.stock_id,
+            FundamentalDataQuarterly.fiscal_date == subquery.c.max_date
         )
 
-        # Stocks passing each filter
-        subquery = (
+        # Per-filter pass counts over every stock's latest quarter, in one
+        # query using aggregate FILTER clauses
+        counts = (
             db.query(
-                FundamentalDataQuarterly.stock_id,
-                func.max(FundamentalDataQuarterly.fiscal_date).label('max_date')
+                func.count(func.distinct(FundamentalDataQuarterly.stock_id)),
+                func.count().filter(
+                    FundamentalDataQuarterly.fcf_price_ratio >= self.min_fcf_price_ratio
+                ),
+                func.count().filter(
+                    FundamentalDataQuarterly.book_to_market >= self.min_book_to_market
+                ),
+                func.count().filter(
+                    and_(
+                        FundamentalDataQuarterly.market_cap >= self.min_market_cap,
+                        FundamentalDataQuarterly.market_cap <= self.max_market_cap
+                    )
+                ),
+                func.count().filter(FundamentalDataQuarterly.is_profitable == True),
             )
-            .group_by(FundamentalDataQuarterly.stock_id)
-            .subquery()
+            .select_from(FundamentalDataQuarterly)
+            .join(subquery, latest_join)
+            .one()
         )
 
-        base_query = (
-            db.query(FundamentalDataQuarterly)
-            .join(
-                subquery,
-                and_(
-                    FundamentalDataQuarterly.stock_id == subquery.c.stock_id,
-                    FundamentalDataQuarterly.fiscal_date == subquery.c.max_date
-                )
+        # Count and average the stocks passing all filters
+        passing = (
+            db.query(
+                func.count(),
+                func.avg(func.coalesce(FundamentalDataQuarterly.fcf_price_ratio, 0)),
+                func.avg(func.coalesce(FundamentalDataQuarterly.book_to_market, 0)),
+                func.avg(func.coalesce(FundamentalDataQuarterly.roa, 0)),
+                func.avg(func.coalesce(FundamentalDataQuarterly.market_cap, 0)),
             )
+            .select_from(Stock)
+            .join(Stock.fundamental_data)
+            .join(subquery, latest_join)
+            .filter(Stock.is_active == True)
+            .filter(and_(*self._fundamental_filters()))
+            .one()
         )
 
         stats = {
-            "total_stocks_with_fundamentals": total_with_fundamentals,
-            "passing_fcf_filter": base_query.filter(
-                FundamentalDataQuarterly.fcf_price_ratio >= self.min_fcf_price_ratio
-            ).count(),
-            "passing_bm_filter": base_query.filter(
-                FundamentalDataQuarterly.book_to_market >= self.min_book_to_market
-            ).count(),
-            "passing_size_filter": base_query.filter(
-                and_(
-                    FundamentalDataQuarterly.market_cap >= self.min_market_cap,
-                    FundamentalDataQuarterly.market_cap <= self.max_market_cap
-                )
-            ).count(),
-            "passing_profitability_filter": base_query.filter(
-                FundamentalDataQuarterly.is_profitable == True
-            ).count(),
-            "passing_all_filters": len(self.screen(db, limit=1000, include_technical=False)),
+            "total_stocks_with_fundamentals": counts[0],
+            "passing_fcf_filter": counts[1],
+            "passing_bm_filter": counts[2],
+            "passing_size_filter": counts[3],
+            "passing_profitability_filter": counts[4],
+            "passing_all_filters": passing[0],
         }
 
         # Average metrics for stocks passing all filters
-        passing_stocks = self.screen(db, limit=1000, include_technical=False)
-        if passing_stocks:
-            stats["avg_fcf_price_ratio"] = sum(s.fcf_price_ratio for s in passing_stocks) / len(passing_stocks)
-            stats["avg_book_to_market"] = sum(s.book_to_market for s in passing_stocks) / len(passing_stocks)
-            stats["avg_roa"] = sum(s.roa for s in passing_stocks) / len(passing_stocks)
-            stats["avg_market_cap"] = sum(s.market_cap for s in passing_stocks) / len(passing_stocks)
+        if passing[0]:
+            stats["avg_fcf_price_ratio"] = passing[1]
+            stats["avg_book_to_market"] = passing[2]
+            stats["avg_roa"] = passing[3]
+            stats["avg_market_cap"] = passing[4]
 
         return stats
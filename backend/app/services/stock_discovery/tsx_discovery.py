@@ -12,14 +12,80 @@ This service:
 5. Runs periodically to keep the universe fresh
 """
 
-import time
-from typing import List, Dict, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Dict, FrozenSet, Optional, Tuple
 from datetime import datetime
 from sqlalchemy.orm import Session
 
+from app.config import get_settings
 from app.models.stock import Stock
 from app.services.market_data import AlphaVantageService
 
+settings = get_settings()
+
+
+# Small & mid cap candidates across various sectors. A starting point -
+# expand this list or fetch from a TSX listing API.
+TSX_CANDIDATES: Tuple[str, ...] = (
+    # Technology
+    "WELL.TO", "DCBO.TO", "TOI.TO", "GDNP.TO", "REAL.TO", "DOC.TO",
+    "OTEX.TO", "ENGH.TO", "GOOS.TO", "LSPD.TO",
+
+    # Energy & Resources
+    "PXT.TO", "TVE.TO", "BTE.TO", "VII.TO", "WCP.TO", "ERF.TO",
+    "CPG.TO", "KEL.TO", "BIR.TO", "ARX.TO", "PEY.TO",
+
+    # Materials & Mining
+    "HBM.TO", "TKO.TO", "FM.TO", "CS.TO", "EDV.TO", "OR.TO",
+    "EQX.TO", "SMT.TO", "MAI.TO", "NGD.TO",
+
+    # Industrials
+    "NFI.TO", "BYD.TO", "GFL.TO", "TOY.TO", "MTY.TO", "GIL.TO",
+    "TIH.TO", "PKI.TO", "CWB.TO",
+
+    # Healthcare
+    "MT.TO", "QIPT.TO", "PHM.TO", "NHC.TO", "CXRX.TO",
+
+    # Financials (smaller)
+    "EQB.TO", "GSY.TO", "HCG.TO", "LB.TO", "FSV.TO", "DXT.TO",
+
+    # Real Estate
+    "CAR-UN.TO", "HR-UN.TO", "DIR-UN.TO", "SRU-UN.TO", "IIP-UN.TO",
+    "MRT-UN.TO", "BTB-UN.TO",
+
+    # Consumer
+    "TFII.TO", "DOL.TO", "ATD.TO", "QSR.TO", "MTY.TO", "PZA.TO",
+    "RECP.TO", "GIL.TO",
+
+    # Telecom
+    "RCI-B.TO", "T.TO", "BCE.TO",
+)
+
+# Large caps kept for diversification even though they're outside the
+# multibagger range
+BLUE_CHIP_SYMBOLS: FrozenSet[str] = frozenset((
+    # Big banks
+    "TD.TO", "RY.TO", "BMO.TO", "BNS.TO", "CM.TO",
+
+    # Energy majors
+    "ENB.TO", "CNQ.TO", "SU.TO", "TRP.TO",
+
+    # Railroads
+    "CP.TO", "CNR.TO",
+
+    # Tech
+    "SHOP.TO",
+
+    # Telecom
+    "BCE.TO", "T.TO", "RCI-B.TO",
+
+    # Utilities
+    "FTS.TO", "EMA.TO",
+
+    # Consumer
+    "ATD.TO", "DOL.TO", "QSR.TO",
+))
+
 
 class TSXStockDiscovery:
     """Discovers and maintains TSX stock universe for multibagger screening"""
@@ -29,7 +95,8 @@ class TSXStockDiscovery:
         min_market_cap: float = 300_000_000,  # $300M
         max_market_cap: float = 2_000_000_000,  # $2B
         include_large_caps: bool = True,  # Keep some large caps for diversification
-        rate_limit_delay: int = 13,  # Seconds between API calls
+        max_workers: Optional[int] = None,
+        rate_limit: Optional[int] = None,
     ):
         """Initialize discovery service
 
@@ -37,13 +104,32 @@ class TSXStockDiscovery:
             min_market_cap: Minimum market cap for small caps ($300M)
             max_market_cap: Maximum market cap for small caps ($2B)
             include_large_caps: Whether to keep large blue chips for diversification
-            rate_limit_delay: Delay between API calls (default 13s for free tier)
+            max_workers: Concurrent overview fetches (default ALPHA_VANTAGE_WORKERS)
+            rate_limit: Alpha Vantage calls per minute (default ALPHA_VANTAGE_RATE_LIMIT)
+
+        Alpha Vantage calls are rate limited by AlphaVantageService's shared
+        throttle, so no fixed delay is needed between symbols.
         """
         self.min_market_cap = min_market_cap
         self.max_market_cap = max_market_cap
         self.include_large_caps = include_large_caps
-        self.rate_limit_delay = rate_limit_delay
-        self.av_service = AlphaVantageService()
+        self.max_workers = max_workers or settings.ALPHA_VANTAGE_WORKERS
+        self.av_service = AlphaVantageService(rate_limit=rate_limit)
+
+    def _iter_overviews(self, symbols: List[str]) -> Iterator[Tuple[str, Optional[Dict]]]:
+        """Yield (symbol, company overview) pairs in input order
+
+        Overviews are fetched max_workers at a time on a thread pool, so
+        requests overlap on the network while the shared throttle keeps the
+        per-minute budget. Chunks are only fetched as the caller consumes
+        them, so stopping early doesn't spend calls on unused symbols.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for start in range(0, len(symbols), self.max_workers):
+                chunk = symbols[start:start + self.max_workers]
+                yield from zip(
+                    chunk, executor.map(self.av_service.fetch_company_overview, chunk)
+                )
 
     def discover_and_update(
         self,
@@ -78,9 +164,18 @@ class TSXStockDiscovery:
         if symbol_list is None:
             symbol_list = self._get_default_tsx_candidates()
 
+        # Drop duplicates (keeping order) so no symbol costs two API calls
+        symbol_list = list(dict.fromkeys(symbol_list))
+
         print(f"Checking {len(symbol_list)} TSX symbols...\n")
 
-        for symbol in symbol_list:
+        # Look up which symbols already exist in one query up front
+        existing = {
+            stock.symbol: stock
+            for stock in db.query(Stock).filter(Stock.symbol.in_(symbol_list))
+        }
+
+        for symbol, overview in self._iter_overviews(symbol_list):
             if stats["added"] >= max_new_stocks:
                 print(f"\nReached max new stocks limit ({max_new_stocks}), stopping.")
                 break
@@ -88,16 +183,11 @@ class TSXStockDiscovery:
             stats["checked"] += 1
 
             try:
-                # Check if stock exists
-                stock = db.query(Stock).filter(Stock.symbol == symbol).first()
-
-                # Get market cap and company info
-                overview = self.av_service.fetch_company_overview(symbol)
+                stock = existing.get(symbol)
 
                 if not overview or "Symbol" not in overview:
                     print(f"⚠ {symbol}: No data available")
                     stats["errors"] += 1
-                    time.sleep(self.rate_limit_delay)
                     continue
 
                 # Parse market cap and name
@@ -112,7 +202,6 @@ class TSXStockDiscovery:
                 if not market_cap:
                     print(f"⚠ {symbol}: No market cap data")
                     stats["errors"] += 1
-                    time.sleep(self.rate_limit_delay)
                     continue
 
                 # Determine if stock fits criteria
@@ -184,13 +273,9 @@ class TSXStockDiscovery:
                             "reason": "outside range"
                         })
 
-                # Rate limiting
-                time.sleep(self.rate_limit_delay)
-
             except Exception as e:
                 print(f"✗ {symbol}: Error - {e}")
                 stats["errors"] += 1
-                time.sleep(self.rate_limit_delay)
 
         # Commit changes
         db.commit()
@@ -238,17 +323,17 @@ class TSXStockDiscovery:
 
         print(f"Reviewing {len(stocks)} active stocks...\n")
 
-        for stock in stocks:
+        stocks_by_symbol = {stock.symbol: stock for stock in stocks}
+
+        # Fetch current market caps, several symbols at a time
+        for symbol, overview in self._iter_overviews(list(stocks_by_symbol)):
+            stock = stocks_by_symbol[symbol]
             stats["reviewed"] += 1
 
             try:
-                # Fetch current market cap
-                overview = self.av_service.fetch_company_overview(stock.symbol)
-
                 if not overview or "Symbol" not in overview:
                     print(f"⚠ {stock.symbol}: No data available")
                     stats["errors"] += 1
-                    time.sleep(self.rate_limit_delay)
                     continue
 
                 market_cap_str = overview.get("MarketCapitalization")
@@ -257,7 +342,6 @@ class TSXStockDiscovery:
                 if not market_cap:
                     print(f"⚠ {stock.symbol}: No market cap data")
                     stats["errors"] += 1
-                    time.sleep(self.rate_limit_delay)
                     continue
 
                 # Check if still in range
@@ -279,12 +363,9 @@ class TSXStockDiscovery:
                         "reason": reason
                     })
 
-                time.sleep(self.rate_limit_delay)
-
             except Exception as e:
                 print(f"✗ {stock.symbol}: Error - {e}")
                 stats["errors"] += 1
-                time.sleep(self.rate_limit_delay)
 
         db.commit()
 
@@ -302,79 +383,18 @@ class TSXStockDiscovery:
     def _get_default_tsx_candidates(self) -> List[str]:
         """Get a curated list of potential TSX small cap candidates
 
-        This is a starting point - you can expand this list or fetch from
-        a TSX listing API.
-
         Returns:
             List of TSX symbols to check
         """
-        # Small & mid cap candidates across various sectors
-        return [
-            # Technology
-            "WELL.TO", "DCBO.TO", "TOI.TO", "GDNP.TO", "REAL.TO", "DOC.TO",
-            "OTEX.TO", "ENGH.TO", "GOOS.TO", "LSPD.TO",
-
-            # Energy & Resources
-            "PXT.TO", "TVE.TO", "BTE.TO", "VII.TO", "WCP.TO", "ERF.TO",
-            "CPG.TO", "KEL.TO", "BIR.TO", "ARX.TO", "PEY.TO",
-
-            # Materials & Mining
-            "HBM.TO", "TKO.TO", "FM.TO", "CS.TO", "EDV.TO", "OR.TO",
-            "EQX.TO", "SMT.TO", "MAI.TO", "NGD.TO",
-
-            # Industrials
-            "NFI.TO", "BYD.TO", "GFL.TO", "TOY.TO", "MTY.TO", "GIL.TO",
-            "TIH.TO", "PKI.TO", "CWB.TO",
-
-            # Healthcare
-            "MT.TO", "QIPT.TO", "PHM.TO", "NHC.TO", "CXRX.TO",
+        return list(TSX_CANDIDATES)
 
-            # Financials (smaller)
-            "EQB.TO", "GSY.TO", "HCG.TO", "LB.TO", "FSV.TO", "DXT.TO",
-
-            # Real Estate
-            "CAR-UN.TO", "HR-UN.TO", "DIR-UN.TO", "SRU-UN.TO", "IIP-UN.TO",
-            "MRT-UN.TO", "BTB-UN.TO",
-
-            # Consumer
-            "TFII.TO", "DOL.TO", "ATD.TO", "QSR.TO", "MTY.TO", "PZA.TO",
-            "RECP.TO", "GIL.TO",
-
-            # Telecom
-            "RCI-B.TO", "T.TO", "BCE.TO",
-        ]
-
-    def _get_blue_chip_symbols(self) -> List[str]:
-        """Get list of blue chip symbols to always keep
-
-        These are large caps kept for diversification even though
-        they're outside the multibagger range.
+    def _get_blue_chip_symbols(self) -> FrozenSet[str]:
+        """Get the blue chip symbols to always keep
 
         Returns:
-            List of blue chip symbols
+            Set of blue chip symbols
         """
-        return [
-            # Big banks
-            "TD.TO", "RY.TO", "BMO.TO", "BNS.TO", "CM.TO",
-
-            # Energy majors
-            "ENB.TO", "CNQ.TO", "SU.TO", "TRP.TO",
-
-            # Railroads
-            "CP.TO", "CNR.TO",
-
-            # Tech
-            "SHOP.TO",
-
-            # Telecom
-            "BCE.TO", "T.TO", "RCI-B.TO",
-
-            # Utilities
-            "FTS.TO", "EMA.TO",
-
-            # Consumer
-            "ATD.TO", "DOL.TO", "QSR.TO",
-        ]
+        return BLUE_CHIP_SYMBOLS
 
     def get_discovery_stats(self, db: Session) -> Dict[str, any]:
         """Get current statistics about the stock universe
@@ -0,0 +1,72 @@
+"""
+Position arithmetic on plain numbers
+
+Kept free of ORM objects so the fill math can be reused (e.g. when
+replaying many fills) without paying attribute-instrumentation overhead
+on every intermediate step. The executor applies the results to the
+Position record in one place.
+"""
+
+from typing import Tuple
+
+
+def mark_to_market(
+    quantity: int, average_cost: float, price: float
+) -> Tuple[float, float, float]:
+    """Value a position at a given price
+
+    Returns:
+        (market_value, unrealized_pnl, unrealized_pnl_pct)
+    """
+    market_value = quantity * price
+    unrealized_pnl = (price - average_cost) * quantity
+    unrealized_pnl_pct = (
+        ((price - average_cost) / average_cost) * 100 if average_cost > 0 else 0
+    )
+    return market_value, unrealized_pnl, unrealized_pnl_pct
+
+
+def buy_update(
+    quantity: int, average_cost: float, buy_quantity: int, buy_price: float
+) -> Tuple[int, float, float, float, float]:
+    """Apply a buy fill to a position
+
+    Returns:
+        (quantity, average_cost, market_value, unrealized_pnl, unrealized_pnl_pct)
+    """
+    if quantity == 0:
+        new_quantity = buy_quantity
+        new_average_cost = buy_price
+    else:
+        # Average up/down
+        total_cost = (quantity * average_cost) + (buy_quantity * buy_price)
+        new_quantity = quantity + buy_quantity
+        new_average_cost = total_cost / new_quantity
+
+    return (
+        new_quantity,
+        new_average_cost,
+        *mark_to_market(new_quantity, new_average_cost, buy_price),
+    )
+
+
+def sell_update(
+    quantity: int, average_cost: float, sell_quantity: int, sell_price: float
+) -> Tuple[int, float, float, float, float]:
+    """Apply a sell fill to a position
+
+    Returns:
+        (quantity, realized_pnl, market_value, unrealized_pnl, unrealized_pnl_pct)
+        where realized_pnl is the P&L realized by this fill only
+    """
+    realized_pnl = (sell_price - average_cost) * sell_quantity
+    new_quantity = quantity - sell_quantity
+
+    if new_quantity == 0:
+        return new_quantity, realized_pnl, 0.0, 0.0, 0.0
+
+    return (
+        new_quantity,
+        realized_pnl,
+        *mark_to_market(new_quantity, average_cost, sell_price),
+    )
@@ -22,12 +22,8 @@ class RiskManager:
         self.settings = self._get_user_settings()
 
     def _get_user_settings(self) -> UserSettings:
-        """Get user trading settings"""
-        settings = (
-            self.db.query(UserSettings)
-            .filter(UserSettings.user_id == self.user.id)
-            .first()
-        )
+        """Get user trading settings (free if eager-loaded)"""
+        settings = self.user.settings
         if not settings:
             raise ValueError("User settings not found")
         return settings
@@ -1,5 +1,8 @@
 from datetime import datetime
-from typing import Optional, Dict
+from functools import cached_property
+from itertools import product
+from types import MappingProxyType
+from typing import Optional, Dict, Iterable, Final, Mapping, Tuple
 from sqlalchemy.orm import Session
 from app.models.user import User, UserSettings
 from app.models.trade import (
@@ -10,38 +13,95 @@ from app.models.trade import (
     TradeExecution,
     Position,
 )
+from app.config import get_settings
 from app.models.stock import Stock
 from app.services.questrade import QuestradeClient
 from .risk_manager import RiskManager
+from .position_math import buy_update, sell_update
+
+app_settings = get_settings()
+
+# Questrade order type names
+_ORDER_TYPE_MAP: Final[Mapping[OrderType, str]] = MappingProxyType({
+    OrderType.MARKET: "Market",
+    OrderType.LIMIT: "Limit",
+    OrderType.STOP: "Stop",
+    OrderType.STOP_LIMIT: "StopLimit",
+})
+
+# Questrade order actions
+_ACTION_MAP: Final[Mapping[OrderSide, str]] = MappingProxyType({
+    OrderSide.BUY: "Buy",
+    OrderSide.SELL: "Sell",
+})
+
+# Questrade order fields for every (order type, side) shape, built once
+_ORDER_FIELDS: Final[Mapping[Tuple[OrderType, OrderSide], Mapping[str, str]]] = (
+    MappingProxyType({
+        (order_type, side): MappingProxyType({
+            "order_type": _ORDER_TYPE_MAP[order_type],
+            "action": _ACTION_MAP[side],
+        })
+        for order_type, side in product(OrderType, OrderSide)
+    })
+)
 
 
 class TradeExecutor:
     """Executes trades through Questrade or paper trading"""
 
-    def __init__(self, db: Session, user: User):
+    def __init__(self, db: Session, user: User, interactive: bool = False):
+        """
+        Args:
+            db: Database session
+            user: User placing the orders
+            interactive: Serving a user request rather than a background
+                task, so market order quotes fail fast (ThrottleTimeout)
+                instead of waiting out the Alpha Vantage rate limit
+        """
         self.db = db
         self.user = user
+        self.interactive = interactive
         self.risk_manager = RiskManager(db, user)
-        self.settings = self._get_user_settings()
+        self._stock_cache: Dict[str, Stock] = {}
 
-    def _get_user_settings(self) -> UserSettings:
-        """Get user settings"""
-        settings = (
-            self.db.query(UserSettings)
-            .filter(UserSettings.user_id == self.user.id)
-            .first()
-        )
+    @cached_property
+    def settings(self) -> UserSettings:
+        """User settings, loaded once per executor (free if eager-loaded)"""
+        settings = self.user.settings
         if not settings:
             raise ValueError("User settings not found")
         return settings
 
+    def prime_stocks(self, symbols: Iterable[str]) -> None:
+        """Load stock records for many symbols in a single query
+
+        Useful before placing a batch of orders so each place_order call
+        hits the per-executor cache instead of the database.
+
+        Args:
+            symbols: Stock symbols to preload
+        """
+        missing = {s for s in symbols if s not in self._stock_cache}
+        if not missing:
+            return
+
+        for stock in self.db.query(Stock).filter(Stock.symbol.in_(missing)).all():
+            self._stock_cache[stock.symbol] = stock
+
     def _get_or_create_stock(self, symbol: str) -> Stock:
         """Get or create stock record"""
+        stock = self._stock_cache.get(symbol)
+        if stock:
+            return stock
+
         stock = self.db.query(Stock).filter(Stock.symbol == symbol).first()
         if not stock:
             stock = Stock(symbol=symbol, name=symbol, exchange="TSX")
             self.db.add(stock)
             self.db.flush()
+
+        self._stock_cache[symbol] = stock
         return stock
 
     def _get_or_create_position(self, stock: Stock) -> Position:
@@ -70,61 +130,51 @@ class TradeExecutor:
         return position
 
     def _update_position_on_buy(
-        self, position: Position, quantity: int, price: float
+        self,
+        position: Position,
+        quantity: int,
+        price: float,
+        now: Optional[datetime] = None,
     ) -> None:
         """Update position after buy execution"""
         if position.quantity == 0:
             # New position
-            position.quantity = quantity
-            position.average_cost = price
             position.is_open = True
-            position.opened_at = datetime.utcnow()
-        else:
-            # Add to existing position (average up/down)
-            total_cost = (position.quantity * position.average_cost) + (quantity * price)
-            position.quantity += quantity
-            position.average_cost = total_cost / position.quantity
-
-        # Update market value
+            position.opened_at = now or datetime.utcnow()
+
+        (
+            position.quantity,
+            position.average_cost,
+            position.market_value,
+            position.unrealized_pnl,
+            position.unrealized_pnl_pct,
+        ) = buy_update(position.quantity, position.average_cost, quantity, price)
         position.current_price = price
-        position.market_value = position.quantity * price
-        position.unrealized_pnl = (price - position.average_cost) * position.quantity
-        position.unrealized_pnl_pct = (
-            ((price - position.average_cost) / position.average_cost) * 100
-            if position.average_cost > 0
-            else 0
-        )
 
     def _update_position_on_sell(
-        self, position: Position, quantity: int, price: float
+        self,
+        position: Position,
+        quantity: int,
+        price: float,
+        now: Optional[datetime] = None,
     ) -> None:
         """Update position after sell execution"""
-        # Calculate realized P&L
-        realized_pnl = (price - position.average_cost) * quantity
+        (
+            position.quantity,
+            realized_pnl,
+            position.market_value,
+            position.unrealized_pnl,
+            position.unrealized_pnl_pct,
+        ) = sell_update(position.quantity, position.average_cost, quantity, price)
         position.realized_pnl += realized_pnl
 
-        # Update quantity
-        position.quantity -= quantity
-
         if position.quantity == 0:
             # Position closed
             position.is_open = False
-            position.closed_at = datetime.utcnow()
-            position.market_value = 0.0
-            position.unrealized_pnl = 0.0
-            position.unrealized_pnl_pct = 0.0
+            position.closed_at = now or datetime.utcnow()
         else:
             # Partial sell
             position.current_price = price
-            position.market_value = position.quantity * price
-            position.unrealized_pnl = (
-                price - position.average_cost
-            ) * position.quantity
-            position.unrealized_pnl_pct = (
-                ((price - position.average_cost) / position.average_cost) * 100
-                if position.average_cost > 0
-                else 0
-            )
 
     def execute_paper_trade(self, order: TradeOrder, price: float) -> TradeExecution:
         """Execute a paper trade (simulated)
@@ -136,13 +186,16 @@ class TradeExecutor:
         Returns:
             TradeExecution record
         """
+        # One timestamp for the whole fill so filled_at never precedes executed_at
+        now = datetime.utcnow()
+
         # Create execution record
         execution = TradeExecution(
             order_id=order.id,
             quantity=order.quantity,
             price=price,
             commission=0.0,  # No commission for paper trading
-            executed_at=datetime.utcnow(),
+            executed_at=now,
         )
         self.db.add(execution)
 
@@ -150,21 +203,21 @@ class TradeExecutor:
         order.filled_quantity = order.quantity
         order.average_fill_price = price
         order.status = OrderStatus.FILLED
-        order.filled_at = datetime.utcnow()
+        order.filled_at = now
 
         # Update position
-        stock = self.db.query(Stock).filter(Stock.id == order.stock_id).first()
+        stock = self.db.get(Stock, order.stock_id)  # identity map hit when loaded
         position = self._get_or_create_position(stock)
 
         if order.side == OrderSide.BUY:
-            self._update_position_on_buy(position, order.quantity, price)
+            self._update_position_on_buy(position, order.quantity, price, now)
             # Set stop loss and take profit
             if order.stop_loss_price:
                 position.stop_loss_price = order.stop_loss_price
             if order.take_profit_price:
                 position.take_profit_price = order.take_profit_price
         else:
-            self._update_position_on_sell(position, order.quantity, price)
+            self._update_position_on_sell(position, order.quantity, price, now)
 
         self.db.commit()
         return execution
@@ -192,24 +245,13 @@ class TradeExecutor:
         if not symbol_id:
             raise ValueError(f"Symbol {stock.symbol} not found")
 
-        # Map order types
-        order_type_map = {
-            OrderType.MARKET: "Market",
-            OrderType.LIMIT: "Limit",
-            OrderType.STOP: "Stop",
-            OrderType.STOP_LIMIT: "StopLimit",
-        }
-
-        action = "Buy" if order.side == OrderSide.BUY else "Sell"
-
         # Place order
         try:
             response = client.place_order(
                 account_id=account_id,
                 symbol_id=symbol_id,
                 quantity=order.quantity,
-                order_type=order_type_map[order.order_type],
-                action=action,
+                **_ORDER_FIELDS[order.order_type, order.side],
                 price=order.limit_price,
                 stop_price=order.stop_price,
             )
@@ -241,6 +283,7 @@ class TradeExecutor:
         take_profit_price: Optional[float] = None,
         reasoning: Optional[str] = None,
         conversation_id: Optional[int] = None,
+        stock: Optional[Stock] = None,
     ) -> TradeOrder:
         """Place a trade order with validation
 
@@ -255,12 +298,18 @@ class TradeExecutor:
             take_profit_price: Take profit price for position
             reasoning: Trading reasoning/rationale
             conversation_id: Associated conversation ID
+            stock: Already-loaded Stock for symbol (skips the lookup)
 
         Returns:
             TradeOrder record
+
+        Raises:
+            ThrottleTimeout: If interactive and the market order quote would
+                have to wait out the Alpha Vantage rate limit
         """
         # Get or create stock
-        stock = self._get_or_create_stock(symbol)
+        if stock is None:
+            stock = self._get_or_create_stock(symbol)
 
         # Determine execution price for validation
         price = limit_price if limit_price else stop_price
@@ -268,7 +317,11 @@ class TradeExecutor:
             # For market orders, get current price
             from app.services.market_data import AlphaVantageService
 
-            av = AlphaVantageService()
+            av = AlphaVantageService(
+                max_wait=app_settings.ALPHA_VANTAGE_INTERACTIVE_MAX_WAIT
+                if self.interactive
+                else None
+            )
             price = av.get_latest_price(symbol)
             if not price:
                 raise ValueError(f"Could not get price for {symbol}")
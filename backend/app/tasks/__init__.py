@@ -1,7 +1,7 @@
 from .celery_app import celery_app
 from .market_data_tasks import update_market_data
 from .sentiment_tasks import update_sentiment_data
-from .trading_tasks import run_trading_analysis, monitor_stop_losses
+from .trading_tasks import run_trading_analysis, monitor_stop_losses, process_price_events
 
 __all__ = [
     "celery_app",
@@ -9,4 +9,5 @@ __all__ = [
     "update_sentiment_data",
     "run_trading_analysis",
     "monitor_stop_losses",
+    "process_price_events",
 ]
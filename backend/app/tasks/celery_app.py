@@ -1,5 +1,6 @@
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_init, worker_process_init
 from app.config import get_settings
 
 settings = get_settings()
@@ -26,8 +27,48 @@ celery_app.conf.update(
     task_track_started=True,
     task_time_limit=30 * 60,  # 30 minutes
     task_soft_time_limit=25 * 60,  # 25 minutes
+    worker_prefetch_multiplier=1,  # Don't let long fundamental tasks starve short ones
+    # Network-bound tasks (Claude, Alpha Vantage quotes, Reddit) go to the "io"
+    # queue, served by a gevent worker. Everything else stays on the default
+    # prefork "celery" queue.
+    task_routes={
+        "app.tasks.trading_tasks.*": {"queue": "io"},
+        "app.tasks.stock_discovery_tasks.*": {"queue": "io"},
+        "app.tasks.sentiment_tasks.*": {"queue": "io"},
+    },
 )
 
+
+@worker_process_init.connect
+def reset_db_pool(**kwargs):
+    """Give each forked prefork child its own connection pool
+
+    The engine is created when the parent imports the tasks, so children
+    would otherwise inherit (and share) the parent's pooled sockets.
+    """
+    from app.database import engine
+
+    engine.dispose(close=False)
+
+
+@worker_init.connect
+def patch_psycopg_for_gevent(**kwargs):
+    """Make psycopg2 cooperative when the worker runs with -P gevent
+
+    Celery monkey-patches the standard library for the gevent pool, but
+    psycopg2 is a C extension and would still block the whole worker on
+    every query without psycogreen's wait callback.
+    """
+    try:
+        from gevent import monkey
+    except ImportError:
+        return
+
+    if monkey.is_module_patched("socket"):
+        from psycogreen.gevent import patch_psycopg
+
+        patch_psycopg()
+
 # Periodic tasks schedule
 celery_app.conf.beat_schedule = {
     # Update market data every hour during trading hours
@@ -50,10 +91,10 @@ celery_app.conf.beat_schedule = {
         "task": "app.tasks.trading_tasks.run_trading_analysis",
         "schedule": crontab(hour=16, minute=0, day_of_week="1-5"),  # Weekdays at 4:00 PM
     },
-    # Monitor stop losses every 5 minutes during trading hours
-    "monitor-stop-losses": {
-        "task": "app.tasks.trading_tasks.monitor_stop_losses",
-        "schedule": crontab(minute="*/5", hour="9-16", day_of_week="1-5"),  # Every 5 min, 9 AM-4 PM
+    # Evaluate stop losses for symbols with new price events (1 min heartbeat)
+    "process-price-events": {
+        "task": "app.tasks.trading_tasks.process_price_events",
+        "schedule": crontab(minute="*", hour="9-16", day_of_week="1-5"),  # Every minute, 9 AM-4 PM
     },
     # Update fundamental data weekly (slow - ~1 min per stock)
     "update-fundamental-data-weekly": {
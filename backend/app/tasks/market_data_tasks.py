@@ -1,39 +1,71 @@
+import logging
 from celery import shared_task
+from sqlalchemy import func
+from sqlalchemy.orm import raiseload
+from app.config import get_settings
 from app.database import get_db_context
-from app.models.stock import Stock
+from app.models.stock import Stock, MarketDataDaily
 from app.services.market_data import AlphaVantageService
+from app.services.market_data.price_events import publish_price
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
 
 
 @shared_task(name="app.tasks.market_data_tasks.update_market_data")
 def update_market_data():
-    """Update market data for all active stocks"""
-    print("Starting market data update...")
+    """Update market data for all active stocks
+
+    With ALPHA_VANTAGE_BULK_QUOTES enabled (premium tier), latest quotes for
+    the whole universe are fetched 100 symbols per call first. Stocks whose
+    latest trading day is already stored skip the per-symbol daily history
+    fetch; their quote is still published to the price event stream.
+    """
+    logger.info("Starting market data update...")
 
     with get_db_context() as db:
         # Get all active stocks
         stocks = db.query(Stock).filter(Stock.is_active == True).all()
 
         if not stocks:
-            print("No active stocks found")
+            logger.info("No active stocks found")
             return {"status": "no_stocks"}
 
         av_service = AlphaVantageService()
         results = {}
 
+        quotes = {}
+        latest_dates = {}
+        if settings.ALPHA_VANTAGE_BULK_QUOTES:
+            quotes = av_service.get_bulk_quotes([s.symbol for s in stocks])
+            latest_dates = dict(
+                db.query(MarketDataDaily.stock_id, func.max(MarketDataDaily.date))
+                .group_by(MarketDataDaily.stock_id)
+                .all()
+            )
+
         for stock in stocks:
             try:
+                quote = quotes.get(stock.symbol)
+                if quote:
+                    stock.last_price = float(quote["close"])
+                    publish_price(stock.symbol, stock.last_price)
+
+                    # Daily history already includes the latest trading day
+                    quote_date = quote.get("timestamp", "")[:10]
+                    latest = latest_dates.get(stock.id)
+                    if latest and quote_date and latest.isoformat() >= quote_date:
+                        results[stock.symbol] = "up_to_date"
+                        continue
+
+                # Rate limited by the shared Alpha Vantage throttle
                 success = av_service.update_stock_data(db, stock)
                 results[stock.symbol] = "success" if success else "failed"
-
-                # Rate limiting: 5 calls per minute for Alpha Vantage free tier
-                import time
-
-                time.sleep(12)  # 12 seconds between calls
             except Exception as e:
-                print(f"Error updating {stock.symbol}: {e}")
+                logger.error("Error updating %s: %s", stock.symbol, e)
                 results[stock.symbol] = f"error: {str(e)}"
 
-        print(f"Market data update complete: {results}")
+        logger.info("Market data update complete: %s", results)
         return results
 
 
@@ -44,7 +76,7 @@ def update_single_stock(symbol: str):
     Args:
         symbol: Stock symbol to update
     """
-    print(f"Updating market data for {symbol}...")
+    logger.info("Updating market data for %s...", symbol)
 
     with get_db_context() as db:
         stock = db.query(Stock).filter(Stock.symbol == symbol).first()
@@ -83,75 +115,60 @@ def update_fundamental_data(batch_size: int = 6):
     - ROA - profitability
     - Asset growth vs EBITDA growth - reinvestment quality
     """
-    print(f"Starting fundamental data update (batch size: {batch_size})...")
+    logger.info("Starting fundamental data update (batch size: %d)...", batch_size)
 
     from datetime import datetime, timedelta
-    from sqlalchemy import func, or_
+    from sqlalchemy import or_
     from app.models.fundamentals import FundamentalDataQuarterly
 
     with get_db_context() as db:
         # Get stocks that haven't been updated recently (or never)
         # Priority: stocks with no data > stocks with old data
+        week_ago = datetime.utcnow() - timedelta(days=7)
+
+        latest_update = (
+            db.query(
+                FundamentalDataQuarterly.stock_id,
+                func.max(FundamentalDataQuarterly.updated_at).label('last_update')
+            )
+            .group_by(FundamentalDataQuarterly.stock_id)
+            .cte('latest_update')
+        )
 
-        # Find stocks with no fundamental data
-        stocks_without_data = (
+        # Single round-trip: stocks without data sort first (NULLS FIRST),
+        # followed by the stalest stocks with data older than 7 days.
+        # The quarterly update only reads Stock columns, so relationships
+        # are set to raise rather than lazy load one query per stock.
+        stocks_to_update = (
             db.query(Stock)
-            .outerjoin(Stock.fundamental_data)
+            .options(raiseload("*"))
+            .outerjoin(latest_update, Stock.id == latest_update.c.stock_id)
             .filter(
                 Stock.is_active == True,
-                FundamentalDataQuarterly.id.is_(None)
+                or_(
+                    latest_update.c.last_update.is_(None),
+                    latest_update.c.last_update < week_ago,
+                )
             )
-            .order_by(Stock.symbol)
+            .order_by(latest_update.c.last_update.asc().nullsfirst(), Stock.symbol)
             .limit(batch_size)
             .all()
         )
 
-        stocks_to_update = stocks_without_data
-
-        # If we need more stocks to fill the batch, get stocks with old data
-        if len(stocks_to_update) < batch_size:
-            remaining = batch_size - len(stocks_to_update)
-
-            # Get stocks with data older than 7 days
-            week_ago = datetime.utcnow() - timedelta(days=7)
-
-            subquery = (
-                db.query(
-                    FundamentalDataQuarterly.stock_id,
-                    func.max(FundamentalDataQuarterly.updated_at).label('last_update')
-                )
-                .group_by(FundamentalDataQuarterly.stock_id)
-                .subquery()
-            )
-
-            stocks_with_old_data = (
-                db.query(Stock)
-                .join(
-                    subquery,
-                    Stock.id == subquery.c.stock_id
-                )
-                .filter(
-                    Stock.is_active == True,
-                    subquery.c.last_update < week_ago,
-                    ~Stock.id.in_([s.id for s in stocks_without_data])
-                )
-                .order_by(subquery.c.last_update)
-                .limit(remaining)
-                .all()
-            )
-
-            stocks_to_update.extend(stocks_with_old_data)
-
         if not stocks_to_update:
-            print("No stocks need updating (all updated within last 7 days)")
+            logger.info("No stocks need updating (all updated within last 7 days)")
             return {
                 "status": "up_to_date",
                 "processed": 0,
                 "message": "All stocks have recent data"
             }
 
-        print(f"\nProcessing {len(stocks_to_update)} stocks...")
-        print(f"Stocks: {', '.join(s.symbol for s in stocks_to_update)}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "Processing %d stocks: %s",
+                len(stocks_to_update),
+                ", ".join(s.symbol for s in stocks_to_update),
+            )
 
         av_service = AlphaVantageService()
         results = {
@@ -163,38 +180,39 @@ def update_fundamental_data(batch_size: int = 6):
 
         for stock in stocks_to_update:
             try:
-                print(f"\n--- Processing {stock.symbol} ---")
+                logger.debug("--- Processing %s ---", stock.symbol)
                 success = av_service.update_fundamental_data_quarterly(db, stock)
 
                 if success:
                     results["success"].append(stock.symbol)
                     results["processed"] += 1
-                    print(f"✓ Successfully updated {stock.symbol}")
+                    logger.info("✓ Successfully updated %s", stock.symbol)
                 else:
                     results["failed"].append(stock.symbol)
-                    print(f"✗ Failed to update {stock.symbol}")
+                    logger.warning("✗ Failed to update %s", stock.symbol)
 
-                # Note: update_fundamental_data_quarterly already includes rate limiting
-                # (4 API calls with 13 sec delays = ~52 sec per stock)
+                # Note: Alpha Vantage calls go through the shared rate limit throttle
 
             except Exception as e:
                 error_msg = str(e)
-                print(f"✗ Error updating {stock.symbol}: {error_msg}")
+                logger.error("✗ Error updating %s: %s", stock.symbol, error_msg)
                 results["failed"].append(stock.symbol)
                 results["errors"][stock.symbol] = error_msg
 
-        print(f"\n{'='*60}")
-        print(f"Fundamental data update complete:")
-        print(f"  Processed: {results['processed']} stocks")
-        print(f"  Success: {len(results['success'])} stocks")
-        print(f"  Failed: {len(results['failed'])} stocks")
+        logger.debug("=" * 60)
+        logger.info(
+            "Fundamental data update complete: processed=%d success=%d failed=%d",
+            results['processed'],
+            len(results['success']),
+            len(results['failed']),
+        )
 
         if results['success']:
-            print(f"\n  ✓ Updated: {', '.join(results['success'])}")
+            logger.info("✓ Updated: %s", ", ".join(results['success']))
         if results['failed']:
-            print(f"\n  ✗ Failed: {', '.join(results['failed'])}")
+            logger.info("✗ Failed: %s", ", ".join(results['failed']))
 
-        print(f"{'='*60}")
+        logger.debug("=" * 60)
 
         return results
 
@@ -206,7 +224,7 @@ def update_single_stock_fundamentals(symbol: str):
     Args:
         symbol: Stock symbol to update
     """
-    print(f"Updating fundamental data for {symbol}...")
+    logger.info("Updating fundamental data for %s...", symbol)
 
     with get_db_context() as db:
         stock = db.query(Stock).filter(Stock.symbol == symbol).first()
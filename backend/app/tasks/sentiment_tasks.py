@@ -1,20 +1,23 @@
+import logging
 from celery import shared_task
 from app.database import get_db_context
 from app.services.sentiment import RedditScraper
 
+logger = logging.getLogger(__name__)
+
 
 @shared_task(name="app.tasks.sentiment_tasks.update_sentiment_data")
 def update_sentiment_data():
     """Scrape Reddit for sentiment data"""
-    print("Starting sentiment data update...")
+    logger.info("Starting sentiment data update...")
 
     with get_db_context() as db:
         scraper = RedditScraper()
 
         try:
             results = scraper.scrape_all_subreddits(db)
-            print(f"Sentiment update complete: {results}")
+            logger.info("Sentiment update complete: %s", results)
             return {"status": "success", "results": results}
         except Exception as e:
-            print(f"Error updating sentiment data: {e}")
+            logger.error("Error updating sentiment data: %s", e)
             return {"status": "error", "error": str(e)}
@@ -1,8 +1,23 @@
+from functools import lru_cache
 from celery import shared_task
 from app.database import get_db_context
+from app.services.cache import clear_cache
 from app.services.stock_discovery import TSXStockDiscovery
 
 
+@lru_cache()
+def _get_discovery() -> TSXStockDiscovery:
+    """Discovery service shared by all tasks in this worker process
+
+    Holds only configuration; the database session is passed per call.
+    """
+    return TSXStockDiscovery(
+        min_market_cap=300_000_000,  # $300M
+        max_market_cap=2_000_000_000,  # $2B
+        include_large_caps=True,  # Keep blue chips
+    )
+
+
 @shared_task(name="app.tasks.stock_discovery_tasks.discover_new_stocks")
 def discover_new_stocks(max_new_stocks: int = 50):
     """Discover and add new TSX stocks that fit multibagger criteria
@@ -22,12 +37,7 @@ def discover_new_stocks(max_new_stocks: int = 50):
     print("Starting stock discovery...")
 
     with get_db_context() as db:
-        discovery = TSXStockDiscovery(
-            min_market_cap=300_000_000,  # $300M
-            max_market_cap=2_000_000_000,  # $2B
-            include_large_caps=True,  # Keep blue chips
-            rate_limit_delay=13,  # Alpha Vantage free tier
-        )
+        discovery = _get_discovery()
 
         stats = discovery.discover_and_update(
             db=db,
@@ -35,7 +45,8 @@ def discover_new_stocks(max_new_stocks: int = 50):
             max_new_stocks=max_new_stocks,
         )
 
-        return stats
+    clear_cache()
+    return stats
 
 
 @shared_task(name="app.tasks.stock_discovery_tasks.review_existing_stocks")
@@ -54,16 +65,12 @@ def review_existing_stocks():
     print("Starting stock review...")
 
     with get_db_context() as db:
-        discovery = TSXStockDiscovery(
-            min_market_cap=300_000_000,
-            max_market_cap=2_000_000_000,
-            include_large_caps=True,
-            rate_limit_delay=13,
-        )
+        discovery = _get_discovery()
 
         stats = discovery.review_existing_stocks(db)
 
-        return stats
+    clear_cache()
+    return stats
 
 
 @shared_task(name="app.tasks.stock_discovery_tasks.full_universe_refresh")
@@ -82,12 +89,7 @@ def full_universe_refresh():
     print("Starting full universe refresh...")
 
     with get_db_context() as db:
-        discovery = TSXStockDiscovery(
-            min_market_cap=300_000_000,
-            max_market_cap=2_000_000_000,
-            include_large_caps=True,
-            rate_limit_delay=13,
-        )
+        discovery = _get_discovery()
 
         # Step 1: Review existing stocks
         print("\n=== STEP 1: Review Existing Stocks ===")
@@ -105,8 +107,9 @@ def full_universe_refresh():
         print("\n=== STEP 3: Final Statistics ===")
         final_stats = discovery.get_discovery_stats(db)
 
-        return {
-            "review": review_stats,
-            "discovery": discovery_stats,
-            "final": final_stats,
-        }
+    clear_cache()
+    return {
+        "review": review_stats,
+        "discovery": discovery_stats,
+        "final": final_stats,
+    }
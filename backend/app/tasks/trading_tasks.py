@@ -1,17 +1,50 @@
-from celery import shared_task
+import json
+import socket
+import uuid
+from collections import defaultdict
+from celery import group, shared_task
+from celery_batches import Batches
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import joinedload
 from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 from app.database import get_db_context
 from app.models.user import User, UserSettings
 from app.models.trade import Position, OrderSide, OrderType
 from app.models.stock import Stock
-from app.services.chat import ClaudeTrader
+from app.redis_client import get_redis
+from app.services.cache import get_active_symbols
+from app.services.chat import ClaudeTrader, analyze_symbols_parallel
 from app.services.market_data import AlphaVantageService
+from app.services.market_data.price_events import consume_prices, ack_prices, get_cached_prices
 from app.services.trading import TradeExecutor
+from app.services.trading.position_math import mark_to_market
+
+
+# analyze_symbol_for_user requests buffered per batch. celery-batches can
+# only fill a batch from prefetched messages, so io workers must prefetch at
+# least this many (concurrency x --prefetch-multiplier); otherwise every
+# batch waits out flush_interval.
+ANALYSIS_BATCH_SIZE = 20
+
+# Fanned-out analysis runs are tracked in Redis for this long (seconds)
+ANALYSIS_RUN_TTL = 24 * 3600
+
+# Fraction of a stop-loss / take-profit level within which a position's
+# last known price is treated as a candidate for a live price check
+TRIGGER_PROXIMITY = 0.02
 
 
 @shared_task(name="app.tasks.trading_tasks.run_trading_analysis")
 def run_trading_analysis():
-    """Run automated trading analysis for all users with auto-trading enabled"""
+    """Run automated trading analysis for all users with auto-trading enabled
+
+    Existing positions are analyzed in-task. For users without positions,
+    the full universe is fanned out as one analyze_symbol_for_user subtask
+    per (user, symbol), so the analyses spread across workers. The subtasks
+    record their results under a shared run id, and the one that completes
+    the run enqueues summarize_trading_analysis to report the totals.
+    """
     print(f"Starting trading analysis at {datetime.utcnow()}")
 
     with get_db_context() as db:
@@ -31,6 +64,7 @@ def run_trading_analysis():
             return {"status": "no_users"}
 
         results = {}
+        fan_out = []
 
         for user in users:
             try:
@@ -41,16 +75,11 @@ def run_trading_analysis():
 
                 # If no positions, analyze all active stocks for opportunities
                 if not decisions:
-                    print(f"User {user.email}: No positions, analyzing all stocks...")
-                    stocks = db.query(Stock).filter(Stock.is_active == True).all()
-
-                    for stock in stocks:
-                        try:
-                            decision = trader.analyze_symbol(stock.symbol)
-                            if decision:
-                                decisions.append(decision)
-                        except Exception as e:
-                            print(f"  Error analyzing {stock.symbol}: {e}")
+                    symbols = get_active_symbols(db)
+                    print(f"User {user.email}: No positions, queueing {len(symbols)} analyses...")
+                    fan_out.extend((user.id, symbol) for symbol in symbols)
+                    results[user.email] = {"status": "queued", "symbols": len(symbols)}
+                    continue
 
                 results[user.email] = {
                     "status": "success",
@@ -65,57 +94,291 @@ def run_trading_analysis():
                 print(f"Error analyzing for user {user.email}: {e}")
                 results[user.email] = {"status": "error", "error": str(e)}
 
-        return results
+    if fan_out:
+        # Not a chord: celery-batches drops the chord from batched requests,
+        # so the header would never complete
+        run_id = uuid.uuid4().hex
+        _start_analysis_run(run_id, len(fan_out))
+        group(
+            analyze_symbol_for_user.s(user_id, symbol, run_id=run_id)
+            for user_id, symbol in fan_out
+        ).apply_async()
+
+    return results
+
+
+def _run_keys(run_id: str):
+    """Redis keys of a fanned-out analysis run: (pending count, results)"""
+    return f"analysis_run:{run_id}:pending", f"analysis_run:{run_id}:results"
 
 
-@shared_task(name="app.tasks.trading_tasks.analyze_symbol_for_user")
-def analyze_symbol_for_user(user_id: int, symbol: str):
+def _start_analysis_run(run_id: str, parts: int) -> None:
+    """Record how many subtask results a fanned-out analysis run expects"""
+    pending_key, _ = _run_keys(run_id)
+    get_redis().set(pending_key, parts, ex=ANALYSIS_RUN_TTL)
+
+
+def _record_analysis_results(run_id: str, results: List[Dict]) -> bool:
+    """Store subtask results for a run
+
+    Returns:
+        True for exactly one caller: the one whose results complete the run
+    """
+    pending_key, results_key = _run_keys(run_id)
+    pipe = get_redis().pipeline()
+    pipe.rpush(results_key, *(json.dumps(result, default=str) for result in results))
+    pipe.expire(results_key, ANALYSIS_RUN_TTL)
+    pipe.decrby(pending_key, len(results))
+    remaining = pipe.execute()[-1]
+    # A redelivered batch can push the count below zero; only the
+    # transition to zero completes the run
+    return remaining == 0
+
+
+# Fan-out tasks ack late so a worker dying mid-task redelivers them and the
+# run still completes; order-placing tasks keep the default early ack so
+# they are never re-run
+@shared_task(name="app.tasks.trading_tasks.summarize_trading_analysis", acks_late=True)
+def summarize_trading_analysis(run_id: str):
+    """Report per-user totals once a fanned-out analysis run completes
+
+    Args:
+        run_id: Analysis run whose analyze_symbol_for_user results to report
+    """
+    pending_key, results_key = _run_keys(run_id)
+    pipe = get_redis().pipeline()
+    pipe.lrange(results_key, 0, -1)
+    pipe.delete(results_key, pending_key)
+    analyses = [json.loads(analysis) for analysis in pipe.execute()[0]]
+
+    summary = defaultdict(lambda: {"decisions": 0, "actions": 0, "errors": 0})
+
+    for analysis in analyses:
+        totals = summary[analysis.get("user_id")]
+        if analysis["status"] == "success":
+            totals["decisions"] += 1
+            totals["actions"] += 1 if analysis["action_taken"] else 0
+        else:
+            totals["errors"] += 1
+
+    for user_id, totals in summary.items():
+        print(f"User {user_id}: {totals['decisions']} decisions, "
+              f"{totals['actions']} actions taken, {totals['errors']} errors")
+
+    return dict(summary)
+
+
+@shared_task(
+    name="app.tasks.trading_tasks.analyze_symbol_for_user",
+    base=Batches,
+    acks_late=True,
+    flush_every=ANALYSIS_BATCH_SIZE,
+    flush_interval=8,
+)
+def analyze_symbol_for_user(requests):
     """Analyze a specific symbol for a user
 
+    Called as analyze_symbol_for_user.delay(user_id, symbol, run_id=None).
+    Requests are buffered (up to 20 or 8 seconds) and each user's symbols
+    are analyzed together on the rate-limited pool, so a burst of requests
+    shares one Claude request budget instead of racing for it. Results of
+    requests with a run_id are also recorded for that analysis run.
+
     Args:
-        user_id: User ID
-        symbol: Stock symbol to analyze
+        requests: Buffered task requests, each with (user_id, symbol) args
     """
-    print(f"Analyzing {symbol} for user {user_id}")
+    symbols_by_user = defaultdict(list)
+    for request in requests:
+        user_id, symbol = _request_args(request, "user_id", "symbol")
+        symbols_by_user[user_id].append(symbol)
+
+    print(f"Analyzing {len(requests)} symbol(s) for {len(symbols_by_user)} user(s)")
 
     with get_db_context() as db:
-        user = db.query(User).filter(User.id == user_id).first()
+        known_users = {
+            user_id
+            for (user_id,) in db.query(User.id)
+            .filter(User.id.in_(list(symbols_by_user)))
+            .all()
+        }
+
+    analyses = {
+        user_id: analyze_symbols_parallel(user_id, list(dict.fromkeys(symbols)))
+        for user_id, symbols in symbols_by_user.items()
+        if user_id in known_users
+    }
+
+    results_by_run = defaultdict(list)
+
+    for request in requests:
+        user_id, symbol = _request_args(request, "user_id", "symbol")
+
+        if user_id not in known_users:
+            result = {"status": "error", "error": "User not found"}
+        else:
+            analysis = analyses[user_id][symbol]
+            if "error" in analysis:
+                print(f"Error analyzing {symbol}: {analysis['error']}")
+                result = {"status": "error", "error": analysis["error"]}
+            else:
+                result = {"status": "success", **analysis}
+
+        result.update(user_id=user_id, symbol=symbol)
+
+        analyze_symbol_for_user.backend.mark_as_done(request.id, result, request=request)
+
+        run_id = request.kwargs.get("run_id")
+        if run_id:
+            results_by_run[run_id].append(result)
+
+    for run_id, results in results_by_run.items():
+        if _record_analysis_results(run_id, results):
+            summarize_trading_analysis.delay(run_id)
+
+
+def _request_args(request, *names):
+    """Read task arguments from a batched request, positional or keyword"""
+    args = list(request.args)
+    return tuple(
+        args[i] if i < len(args) else request.kwargs[name]
+        for i, name in enumerate(names)
+    )
 
-        if not user:
-            return {"status": "error", "error": "User not found"}
 
+def _trigger(position: Position, current_price: float) -> Optional[str]:
+    """Which exit a price triggers for a position
+
+    Returns:
+        "stop_loss", "take_profit", or None if nothing triggered
+    """
+    if current_price <= position.stop_loss_price:
+        return "stop_loss"
+    if position.take_profit_price and current_price >= position.take_profit_price:
+        return "take_profit"
+    return None
+
+
+def _execute_triggers(db, pending: List[Tuple]) -> List[Dict]:
+    """Place the exit orders for triggered positions
+
+    Called after the caller has written its price updates and committed,
+    so place_order's commits don't expire the rest of the batch. That
+    commit also released the row locks, so each position is re-claimed
+    before selling: another worker that holds it (or already closed it)
+    wins and this one skips it.
+
+    Args:
+        db: Database session
+        pending: (position id, stock, user, current price, trigger) tuples
+
+    Returns:
+        Details of the placed orders
+    """
+    triggered = []
+
+    for position_id, stock, user, current_price, trigger in pending:
         try:
-            trader = ClaudeTrader(db, user)
-            decision = trader.analyze_symbol(symbol)
-
-            return {
-                "status": "success",
-                "decision": decision.decision,
-                "confidence": decision.confidence,
-                "action_taken": decision.action_taken,
-                "reasoning": decision.reasoning,
-            }
+            position = (
+                db.query(Position)
+                .filter(Position.id == position_id, Position.is_open == True)
+                .with_for_update(skip_locked=True)
+                .first()
+            )
+            if position is None:
+                continue
+
+            if trigger == "stop_loss":
+                print(f"Stop loss triggered for {stock.symbol}: "
+                      f"${current_price} <= ${position.stop_loss_price}")
+                reasoning = f"Stop loss triggered at ${current_price}"
+                level = {"stop_loss": position.stop_loss_price}
+            else:
+                print(f"Take profit triggered for {stock.symbol}: "
+                      f"${current_price} >= ${position.take_profit_price}")
+                reasoning = f"Take profit triggered at ${current_price}"
+                level = {"take_profit": position.take_profit_price}
+
+            quantity = position.quantity
+            order = TradeExecutor(db, user).place_order(
+                symbol=stock.symbol,
+                side=OrderSide.SELL,
+                quantity=quantity,
+                order_type=OrderType.MARKET,
+                reasoning=reasoning,
+                stock=stock,
+            )
+
+            triggered.append({
+                "symbol": stock.symbol,
+                "user": user.email,
+                "quantity": quantity,
+                "price": current_price,
+                **level,
+                "order_id": order.id,
+            })
+
         except Exception as e:
-            print(f"Error analyzing {symbol}: {e}")
-            return {"status": "error", "error": str(e)}
+            db.rollback()
+            print(f"Error executing exit for {stock.symbol}: {e}")
+
+    return triggered
+
+
+def _price_update(position: Position, current_price: float, now: datetime) -> Dict:
+    """Build a bulk_update_mappings row marking a position to market"""
+    market_value, unrealized_pnl, unrealized_pnl_pct = mark_to_market(
+        position.quantity, position.average_cost, current_price
+    )
+    return {
+        "id": position.id,
+        "current_price": current_price,
+        "market_value": market_value,
+        "unrealized_pnl": unrealized_pnl,
+        "unrealized_pnl_pct": unrealized_pnl_pct,
+        "updated_at": now,
+    }
 
 
 @shared_task(name="app.tasks.trading_tasks.monitor_stop_losses")
 def monitor_stop_losses():
-    """Monitor open positions and execute stop losses if triggered"""
+    """Monitor open positions and execute stop losses if triggered
+
+    Only positions near a trigger (per Stock.last_price) get a live quote,
+    fetched in one batch; the rest are marked to market only when a fresh
+    quote is already cached. Scheduled monitoring is driven by
+    process_price_events; this task remains for on-demand runs.
+    """
     print("Monitoring stop losses...")
 
     with get_db_context() as db:
+        # Positions whose last known price is within TRIGGER_PROXIMITY of a
+        # trigger (or unknown) need a live quote; the rest only use a quote
+        # already in the Redis cache, without calling Alpha Vantage
+        near_trigger = or_(
+            Stock.last_price.is_(None),
+            Stock.last_price <= Position.stop_loss_price * (1 + TRIGGER_PROXIMITY),
+            and_(
+                Position.take_profit_price.isnot(None),
+                Stock.last_price >= Position.take_profit_price * (1 - TRIGGER_PROXIMITY),
+            ),
+        ).label("near_trigger")
+
         # Get all open positions with stop losses
+        # Stock/User rows land in the identity map; settings are eager-loaded
+        # so trade execution doesn't issue per-position lookups. Positions
+        # are locked and rows held by a concurrent run are skipped, so each
+        # position is evaluated by one worker only.
         positions = (
-            db.query(Position, Stock, User)
+            db.query(Position, Stock, User, near_trigger)
             .join(Stock)
             .join(User)
+            .options(joinedload(User.settings))
             .filter(
                 Position.is_open == True,
                 Position.stop_loss_price.isnot(None),
                 User.is_active == True,
             )
+            .with_for_update(of=Position, skip_locked=True)
             .all()
         )
 
@@ -123,88 +386,110 @@ def monitor_stop_losses():
             return {"status": "no_positions"}
 
         av_service = AlphaVantageService()
-        triggered = []
+        pending = []
+        updates = []
+        now = datetime.utcnow()
 
-        for position, stock, user in positions:
+        # Live-price every distinct candidate symbol in one batch
+        prices = av_service.get_latest_prices(
+            [stock.symbol for _, stock, _, candidate in positions if candidate]
+        )
+
+        # Stock.last_price is the daily close, stale intraday, so the other
+        # positions are left unchanged unless a fresh quote is cached
+        try:
+            cached = get_cached_prices(
+                [stock.symbol for _, stock, _, candidate in positions if not candidate]
+            )
+        except Exception as e:
+            print(f"Error reading cached prices: {e}")
+            cached = {}
+
+        for position, stock, user, candidate in positions:
             try:
-                # Get current price
-                current_price = av_service.get_latest_price(stock.symbol)
+                current_price = (prices if candidate else cached).get(stock.symbol)
 
                 if not current_price:
                     continue
 
-                # Update position price
-                position.current_price = current_price
-                position.market_value = position.quantity * current_price
-                position.unrealized_pnl = (
-                    current_price - position.average_cost
-                ) * position.quantity
-                position.unrealized_pnl_pct = (
-                    ((current_price - position.average_cost) / position.average_cost) * 100
-                    if position.average_cost > 0
-                    else 0
-                )
-
-                # Check stop loss
-                if current_price <= position.stop_loss_price:
-                    print(f"Stop loss triggered for {stock.symbol}: "
-                          f"${current_price} <= ${position.stop_loss_price}")
-
-                    # Execute stop loss
-                    executor = TradeExecutor(db, user)
-
-                    order = executor.place_order(
-                        symbol=stock.symbol,
-                        side=OrderSide.SELL,
-                        quantity=position.quantity,
-                        order_type=OrderType.MARKET,
-                        reasoning=f"Stop loss triggered at ${current_price}",
-                    )
-
-                    triggered.append({
-                        "symbol": stock.symbol,
-                        "user": user.email,
-                        "quantity": position.quantity,
-                        "price": current_price,
-                        "stop_loss": position.stop_loss_price,
-                        "order_id": order.id,
-                    })
-
-                # Check take profit
-                elif (
-                    position.take_profit_price
-                    and current_price >= position.take_profit_price
-                ):
-                    print(f"Take profit triggered for {stock.symbol}: "
-                          f"${current_price} >= ${position.take_profit_price}")
-
-                    executor = TradeExecutor(db, user)
-
-                    order = executor.place_order(
-                        symbol=stock.symbol,
-                        side=OrderSide.SELL,
-                        quantity=position.quantity,
-                        order_type=OrderType.MARKET,
-                        reasoning=f"Take profit triggered at ${current_price}",
-                    )
-
-                    triggered.append({
-                        "symbol": stock.symbol,
-                        "user": user.email,
-                        "quantity": position.quantity,
-                        "price": current_price,
-                        "take_profit": position.take_profit_price,
-                        "order_id": order.id,
-                    })
+                updates.append(_price_update(position, current_price, now))
+                trigger = _trigger(position, current_price)
+                if trigger:
+                    pending.append((position.id, stock, user, current_price, trigger))
 
             except Exception as e:
                 print(f"Error monitoring {stock.symbol}: {e}")
 
+        # One batched UPDATE for all positions, then the exit orders
+        db.bulk_update_mappings(Position, updates)
         db.commit()
+        triggered = _execute_triggers(db, pending)
 
         return {
             "status": "success",
             "positions_monitored": len(positions),
+            "live_quotes": len(prices),
             "stop_losses_triggered": len(triggered),
             "triggered": triggered,
         }
+
+
+@shared_task(name="app.tasks.trading_tasks.process_price_events")
+def process_price_events():
+    """Evaluate stop losses for symbols that received a new price
+
+    Consumes the price event stream published by market data ingestion,
+    so only open positions in symbols with a new price are queried.
+    Scheduled every minute during trading hours as a heartbeat.
+    """
+    prices, message_ids = consume_prices(consumer=socket.gethostname())
+
+    if not prices:
+        # Nothing to evaluate, but trimmed pending entries still need acking
+        ack_prices(message_ids)
+        return {"status": "no_events"}
+
+    with get_db_context() as db:
+        # Stock/User rows land in the identity map; settings are eager-loaded
+        # so trade execution doesn't issue per-position lookups. Positions
+        # being evaluated by a concurrent run are skipped.
+        positions = (
+            db.query(Position, Stock, User)
+            .join(Stock)
+            .join(User)
+            .options(joinedload(User.settings))
+            .filter(
+                Position.is_open == True,
+                Position.stop_loss_price.isnot(None),
+                User.is_active == True,
+                Stock.symbol.in_(prices.keys()),
+            )
+            .with_for_update(of=Position, skip_locked=True)
+            .all()
+        )
+
+        pending = []
+        updates = []
+        now = datetime.utcnow()
+
+        for position, stock, user in positions:
+            current_price = prices[stock.symbol]
+            updates.append(_price_update(position, current_price, now))
+            trigger = _trigger(position, current_price)
+            if trigger:
+                pending.append((position.id, stock, user, current_price, trigger))
+
+        # One batched UPDATE for all positions, then the exit orders
+        db.bulk_update_mappings(Position, updates)
+        db.commit()
+        triggered = _execute_triggers(db, pending)
+
+    ack_prices(message_ids)
+
+    return {
+        "status": "success",
+        "symbols_updated": len(prices),
+        "positions_monitored": len(positions),
+        "stop_losses_triggered": len(triggered),
+        "triggered": triggered,
+    }
@@ -13,8 +13,8 @@ sys.path.insert(0, str(backend_path))
 
 from app.database import SessionLocal
 from app.models.user import User, UserSettings
-from app.models.stock import Stock
-from app.services.chat import ClaudeTrader
+from app.services.cache import get_active_symbols
+from app.services.chat import analyze_symbols_parallel
 
 
 def analyze_all_stocks():
@@ -43,33 +43,28 @@ def analyze_all_stocks():
         print(f"✓ Found {len(users)} user(s) with auto-trading enabled\n")
 
         # Get all active stocks
-        stocks = db.query(Stock).filter(Stock.is_active == True).all()
+        symbols = list(get_active_symbols(db))
 
-        if not stocks:
+        if not symbols:
             print("❌ No stocks found in database")
             return
 
-        print(f"✓ Analyzing {len(stocks)} stocks...\n")
+        print(f"✓ Analyzing {len(symbols)} stocks...\n")
 
         total_decisions = 0
 
         for user in users:
             print(f"Analyzing for user: {user.email}")
-            trader = ClaudeTrader(db, user)
 
-            for stock in stocks:
-                try:
-                    print(f"  Analyzing {stock.symbol}...", end=" ")
-                    decision = trader.analyze_symbol(stock.symbol)
+            analyses = analyze_symbols_parallel(user.id, symbols)
 
-                    if decision:
-                        print(f"✓ {decision.decision.upper()} (confidence: {decision.confidence:.1%})")
-                        total_decisions += 1
-                    else:
-                        print("⚠ No decision")
-
-                except Exception as e:
-                    print(f"✗ Error: {e}")
+            for symbol, analysis in analyses.items():
+                if "error" in analysis:
+                    print(f"  {symbol}: ✗ Error: {analysis['error']}")
+                else:
+                    print(f"  {symbol}: ✓ {analysis['decision'].upper()} "
+                          f"(confidence: {analysis['confidence'] or 0:.1%})")
+                    total_decisions += 1
 
             print()
 
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Check that every Celery task name is registered exactly once.
+
+Celery silently replaces a task when two functions register the same
+name, so a duplicated task module would go unnoticed at runtime.
+
+Usage:
+    python scripts/check-task-names.py
+"""
+
+import ast
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+TASKS_DIR = Path(__file__).parent.parent / "app" / "tasks"
+
+
+def find_task_names(path: Path):
+    """Yield (task name, line number) for each @shared_task(name=...) in a file"""
+    tree = ast.parse(path.read_text(), filename=str(path))
+
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.FunctionDef):
+            continue
+        for decorator in node.decorator_list:
+            if not isinstance(decorator, ast.Call):
+                continue
+            if getattr(decorator.func, "id", None) != "shared_task":
+                continue
+            for keyword in decorator.keywords:
+                if keyword.arg == "name" and isinstance(keyword.value, ast.Constant):
+                    yield keyword.value.value, node.lineno
+
+
+def main():
+    registrations = defaultdict(list)
+
+    for path in sorted(TASKS_DIR.glob("*.py")):
+        for name, lineno in find_task_names(path):
+            registrations[name].append(f"{path.name}:{lineno}")
+
+    duplicates = {name: locs for name, locs in registrations.items() if len(locs) > 1}
+
+    if duplicates:
+        print("✗ Duplicate Celery task names:")
+        for name, locations in duplicates.items():
+            print(f"  {name}: {', '.join(locations)}")
+        sys.exit(1)
+
+    print(f"✓ {len(registrations)} task names, no duplicates")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,32 +8,60 @@ This script can:
 3. Full refresh (both discovery and review)
 """
 
+import logging
 import sys
 from pathlib import Path
+from typing import Optional
 
 # Add backend to path
 backend_path = Path(__file__).parent.parent
 sys.path.insert(0, str(backend_path))
 
+from sqlalchemy.orm import Session
+
 from app.database import SessionLocal
 from app.services.stock_discovery import TSXStockDiscovery
 
+logger = logging.getLogger(__name__)
+
+
+# Alpha Vantage calls per minute for this run (--quota N); None uses
+# ALPHA_VANTAGE_RATE_LIMIT
+QUOTA: Optional[int] = None
+
+
+def _make_discovery() -> TSXStockDiscovery:
+    """Discovery service configured for the multibagger range"""
+    return TSXStockDiscovery(
+        min_market_cap=300_000_000,
+        max_market_cap=2_000_000_000,
+        include_large_caps=True,
+        rate_limit=QUOTA,
+    )
 
-def discover_new_stocks(max_new: int = 50):
-    """Discover and add new TSX stocks"""
-    db = SessionLocal()
+
+def discover_new_stocks(
+    max_new: int = 50,
+    db: Optional[Session] = None,
+    discovery: Optional[TSXStockDiscovery] = None,
+):
+    """Discover and add new TSX stocks
+
+    Args:
+        max_new: Maximum number of new stocks to add
+        db: Session to use (a new one is opened and closed if omitted)
+        discovery: Discovery service to use (created if omitted)
+    """
+    owns_session = db is None
+    if owns_session:
+        db = SessionLocal()
 
     try:
         print("=== TSX STOCK DISCOVERY ===\n")
         print("This will check potential TSX small caps and add those in the")
         print("$300M-$2B market cap range (multibagger sweet spot).\n")
 
-        discovery = TSXStockDiscovery(
-            min_market_cap=300_000_000,
-            max_market_cap=2_000_000_000,
-            include_large_caps=True,
-            rate_limit_delay=13,
-        )
+        discovery = discovery or _make_discovery()
 
         stats = discovery.discover_and_update(
             db=db,
@@ -71,29 +99,33 @@ def discover_new_stocks(max_new: int = 50):
         print("   docker-compose exec backend python scripts/screen-multibaggers.py")
 
     except Exception as e:
-        print(f"❌ Error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error: %s", e)
         db.rollback()
     finally:
-        db.close()
+        if owns_session:
+            db.close()
 
 
-def review_existing_stocks():
-    """Review existing stocks and update their status"""
-    db = SessionLocal()
+def review_existing_stocks(
+    db: Optional[Session] = None,
+    discovery: Optional[TSXStockDiscovery] = None,
+):
+    """Review existing stocks and update their status
+
+    Args:
+        db: Session to use (a new one is opened and closed if omitted)
+        discovery: Discovery service to use (created if omitted)
+    """
+    owns_session = db is None
+    if owns_session:
+        db = SessionLocal()
 
     try:
         print("=== REVIEWING EXISTING STOCKS ===\n")
         print("This will check all active stocks and deactivate those that")
         print("are no longer in the $300M-$2B range.\n")
 
-        discovery = TSXStockDiscovery(
-            min_market_cap=300_000_000,
-            max_market_cap=2_000_000_000,
-            include_large_caps=True,
-            rate_limit_delay=13,
-        )
+        discovery = discovery or _make_discovery()
 
         stats = discovery.review_existing_stocks(db)
 
@@ -110,12 +142,11 @@ def review_existing_stocks():
         print(f"{'='*60}")
 
     except Exception as e:
-        print(f"❌ Error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error: %s", e)
         db.rollback()
     finally:
-        db.close()
+        if owns_session:
+            db.close()
 
 
 def full_refresh():
@@ -131,17 +162,24 @@ def full_refresh():
         print("Cancelled.")
         return
 
-    # Step 1: Review existing
-    print("\n" + "="*60)
-    print("STEP 1: REVIEWING EXISTING STOCKS")
-    print("="*60 + "\n")
-    review_existing_stocks()
+    # Both steps share one session and discovery service
+    db = SessionLocal()
+    discovery = _make_discovery()
 
-    # Step 2: Discover new
-    print("\n" + "="*60)
-    print("STEP 2: DISCOVERING NEW STOCKS")
-    print("="*60 + "\n")
-    discover_new_stocks(max_new=50)
+    try:
+        # Step 1: Review existing
+        print("\n" + "="*60)
+        print("STEP 1: REVIEWING EXISTING STOCKS")
+        print("="*60 + "\n")
+        review_existing_stocks(db=db, discovery=discovery)
+
+        # Step 2: Discover new
+        print("\n" + "="*60)
+        print("STEP 2: DISCOVERING NEW STOCKS")
+        print("="*60 + "\n")
+        discover_new_stocks(max_new=50, db=db, discovery=discovery)
+    finally:
+        db.close()
 
     print("\n" + "="*60)
     print("FULL REFRESH COMPLETE")
@@ -168,6 +206,11 @@ def show_stats():
 
 
 if __name__ == "__main__":
+    if "--quota" in sys.argv:
+        i = sys.argv.index("--quota")
+        QUOTA = int(sys.argv[i + 1])
+        del sys.argv[i:i + 2]
+
     if len(sys.argv) > 1:
         command = sys.argv[1]
 
@@ -191,6 +234,8 @@ if __name__ == "__main__":
             print("  python discover-stocks.py review              - Review existing stocks")
             print("  python discover-stocks.py refresh             - Full refresh (both)")
             print("  python discover-stocks.py stats               - Show statistics")
+            print("\nOptions:")
+            print("  --quota N   Alpha Vantage calls per minute (default: configured rate limit)")
 
     else:
         print("TSX Stock Discovery - Keep your multibagger universe fresh\n")
@@ -208,6 +253,9 @@ if __name__ == "__main__":
         print("  python scripts/discover-stocks.py stats")
         print("    Show current stock universe statistics")
         print()
+        print("  --quota N")
+        print("    Alpha Vantage calls per minute (default: configured rate limit)")
+        print()
         print("Examples:")
         print("  python scripts/discover-stocks.py discover 20")
         print("  python scripts/discover-stocks.py review")
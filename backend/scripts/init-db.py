@@ -10,6 +10,9 @@ from pathlib import Path
 backend_path = Path(__file__).parent.parent
 sys.path.insert(0, str(backend_path))
 
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
 from app.database import SessionLocal
 from app.models import Stock
 
@@ -71,26 +74,40 @@ SAMPLE_STOCKS = [
     {"symbol": "DOL.TO", "name": "Dollarama Inc", "sector": "Consumer Discretionary"},
 ]
 
+# Insert payload and symbol -> name lookup, built once at import
+_ROWS = tuple({**s, "exchange": "TSX", "is_active": True} for s in SAMPLE_STOCKS)
+_NAMES = {s["symbol"]: s["name"] for s in SAMPLE_STOCKS}
+
 
-def init_stocks():
-    """Initialize stock database with common TSX stocks"""
+def init_stocks(verbose: bool = False):
+    """Initialize stock database with common TSX stocks
+
+    Args:
+        verbose: Also report the total number of stocks in the database
+    """
     db = SessionLocal()
     try:
         print("Initializing stocks...")
-        added = 0
 
-        for stock_data in SAMPLE_STOCKS:
-            existing = db.query(Stock).filter(Stock.symbol == stock_data["symbol"]).first()
+        # One INSERT for all sample stocks; existing symbols are skipped and
+        # RETURNING reports only the rows actually added
+        stmt = (
+            pg_insert(Stock)
+            .values(_ROWS)
+            .on_conflict_do_nothing(index_elements=["symbol"])
+            .returning(Stock.symbol)
+        )
+        added_symbols = [symbol for (symbol,) in db.execute(stmt).fetchall()]
 
-            if not existing:
-                stock = Stock(**stock_data, exchange="TSX", is_active=True)
-                db.add(stock)
-                added += 1
-                print(f"  Added {stock_data['symbol']} - {stock_data['name']}")
+        for symbol in added_symbols:
+            print(f"  Added {symbol} - {_NAMES[symbol]}")
 
         db.commit()
-        print(f"\n✓ Added {added} new stocks")
-        print(f"✓ Total stocks in database: {db.query(Stock).count()}")
+        print(f"\n✓ Added {len(added_symbols)} new stocks")
+
+        if verbose:
+            total = db.execute(select(func.count()).select_from(Stock)).scalar()
+            print(f"✓ Total stocks in database: {total}")
 
     except Exception as e:
         print(f"Error: {e}")
@@ -100,4 +117,4 @@ def init_stocks():
 
 
 if __name__ == "__main__":
-    init_stocks()
+    init_stocks(verbose="--verbose" in sys.argv[1:])
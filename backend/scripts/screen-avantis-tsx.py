@@ -13,6 +13,11 @@ Usage:
     python scripts/screen-avantis-tsx.py [num_stocks]
     python scripts/screen-avantis-tsx.py 20        # Screen for top 20 stocks
     python scripts/screen-avantis-tsx.py portfolio # Show portfolio weights
+    python scripts/screen-avantis-tsx.py 20 --json out.json --parquet out.parquet
+
+Output is block-buffered and written in a few large writes; add --stream
+to print line by line as results are produced. With --json/--parquet the
+candidates are written to the given files instead of printed.
 """
 
 import sys
@@ -22,13 +27,17 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.database import get_db_context
+from app.services.screening import export_candidates, pop_export_paths
 from app.services.screening.avantis_tsx_screener import AvantisTSXScreener
 
+USAGE = "Usage: python screen-avantis-tsx.py [num_stocks|portfolio] [--json FILE] [--parquet FILE]"
+
 
 def main():
     """Run Avantis-style TSX screening"""
 
     # Parse arguments
+    json_path, parquet_path = pop_export_paths(sys.argv, USAGE)
     limit = 20
     show_portfolio = False
 
@@ -41,7 +50,7 @@ def main():
                 limit = int(sys.argv[1])
             except ValueError:
                 print(f"Invalid argument: {sys.argv[1]}")
-                print("Usage: python screen-avantis-tsx.py [num_stocks|portfolio]")
+                print(USAGE)
                 return
 
     # Initialize screener with Avantis-style parameters
@@ -55,13 +64,22 @@ def main():
     )
 
     with get_db_context() as db:
+        # Export mode: write the raw candidates and skip the report
+        if json_path or parquet_path:
+            candidates = screener.get_candidates(db, limit=limit)
+            export_candidates(candidates, json_path=json_path, parquet_path=parquet_path)
+            for path in filter(None, (json_path, parquet_path)):
+                print(f"Wrote {len(candidates)} candidates to {path}")
+            return
+
         print("=" * 80)
         print("AVANTIS-STYLE TSX SCREENING")
         print("=" * 80)
         print()
 
-        # Get statistics
-        stats = screener.get_statistics(db)
+        # Get statistics and candidates from one screening pass
+        result = screener.evaluate(db, limit=limit)
+        stats = result.stats
 
         print("📊 SCREENING STATISTICS")
         print(f"Total stocks with fundamental data: {stats['total_stocks_with_fundamentals']}")
@@ -85,8 +103,7 @@ def main():
         print()
         print("=" * 80)
 
-        # Get candidates
-        candidates = screener.get_candidates(db, limit=limit)
+        candidates = result.candidates
 
         if not candidates:
             print()
@@ -104,16 +121,13 @@ def main():
 
         # Show portfolio or detailed results
         if show_portfolio:
-            # Get portfolio weights
-            portfolio = screener.get_portfolio_weights(db, num_holdings=20, weighting_method="equal")
+            # Weight the screened candidates (limit is 20 in portfolio mode)
+            portfolio = screener.weight_candidates(candidates, weighting_method="equal")
 
             print("PORTFOLIO ALLOCATION (Equal Weight)")
             print()
 
-            for i, (stock, weight) in enumerate(portfolio, 1):
-                # Find the candidate for this stock
-                candidate = next(c for c in candidates if c.stock_id == stock.id)
-
+            for i, (candidate, weight) in enumerate(portfolio, 1):
                 print(f"{i}. {candidate.symbol} - {candidate.name}")
                 print(f"   Weight: {weight:.2%}")
                 print(f"   Sector: {candidate.sector}")
@@ -166,4 +180,11 @@ def main():
 
 
 if __name__ == "__main__":
+    if "--stream" in sys.argv:
+        sys.argv.remove("--stream")
+    else:
+        # A terminal stdout is line-buffered (one write per line); buffer
+        # the report and write it out in large chunks instead
+        sys.stdout.reconfigure(line_buffering=False)
+
     main()
@@ -4,25 +4,46 @@ Screen for potential multibagger stocks using Yartseva's criteria.
 
 This script applies the research findings from "The Alchemy of Multibagger Stocks"
 to identify TSX stocks with the highest potential for 10x+ returns.
+
+Usage:
+    python scripts/screen-multibaggers.py [limit] [--no-stats] [--stream]
+    python scripts/screen-multibaggers.py [limit] [--json FILE] [--parquet FILE]
+
+Output is block-buffered and written in a few large writes; pass --stream
+to print line by line as results are produced. With --json/--parquet the
+candidates are written to the given files instead of printed.
 """
 
+import logging
 import sys
 from pathlib import Path
+from typing import Optional
 
 # Add backend to path
 backend_path = Path(__file__).parent.parent
 sys.path.insert(0, str(backend_path))
 
 from app.database import SessionLocal
-from app.services.screening import MultibaggerScreener
+from app.services.screening import MultibaggerScreener, export_candidates, pop_export_paths
+
+logger = logging.getLogger(__name__)
 
+USAGE = "Usage: python screen-multibaggers.py [limit] [--no-stats] [--json FILE] [--parquet FILE]"
 
-def screen_multibaggers(limit: int = 20, show_stats: bool = True):
+
+def screen_multibaggers(
+    limit: int = 20,
+    show_stats: bool = True,
+    json_path: Optional[str] = None,
+    parquet_path: Optional[str] = None,
+):
     """Run multibagger screening
 
     Args:
         limit: Maximum number of results to show
         show_stats: Whether to show screening statistics
+        json_path: Write candidates to this JSON file instead of printing
+        parquet_path: Write candidates to this Parquet file instead of printing
     """
     db = SessionLocal()
 
@@ -41,6 +62,14 @@ def screen_multibaggers(limit: int = 20, show_stats: bool = True):
             require_reinvestment_quality=False,  # Optional (needs 2+ years data)
         )
 
+        # Export mode: write the raw candidates and skip the report
+        if json_path or parquet_path:
+            candidates = screener.screen(db, limit=limit, include_technical=True)
+            export_candidates(candidates, json_path=json_path, parquet_path=parquet_path)
+            for path in filter(None, (json_path, parquet_path)):
+                print(f"Wrote {len(candidates)} candidates to {path}")
+            return
+
         # Show statistics if requested
         if show_stats:
             print("SCREENING STATISTICS:")
@@ -61,22 +90,16 @@ def screen_multibaggers(limit: int = 20, show_stats: bool = True):
 
             print("\n" + "="*80 + "\n")
 
-        # Run screening
+        # Run screening, printing each candidate as soon as its rank is final
         print(f"SCREENING RESULTS (Top {limit}):\n")
-        candidates = screener.screen(db, limit=limit, include_technical=True)
-
-        if not candidates:
-            print("❌ No stocks found matching the multibagger criteria")
-            print("\nPossible reasons:")
-            print("  1. No fundamental data in database (run: python scripts/test-fundamentals.py)")
-            print("  2. Criteria too strict (try lowering min_fcf_price_ratio or min_book_to_market)")
-            print("  3. Most TSX stocks don't meet small cap requirement")
-            return
-
-        print(f"Found {len(candidates)} potential multibagger candidates\n")
         print("="*80)
+        found = 0
+
+        for i, candidate in enumerate(
+            screener.iter_screen(db, limit=limit, include_technical=True), 1
+        ):
+            found = i
 
-        for i, candidate in enumerate(candidates, 1):
             print(f"\n{i}. {candidate.symbol} - {candidate.name}")
             print(f"   Sector: {candidate.sector}")
             print(f"   MULTIBAGGER SCORE: {candidate.multibagger_score:.1f}/100\n")
@@ -109,6 +132,15 @@ def screen_multibaggers(limit: int = 20, show_stats: bool = True):
 
             print("\n" + "-"*80)
 
+        if not found:
+            print("❌ No stocks found matching the multibagger criteria")
+            print("\nPossible reasons:")
+            print("  1. No fundamental data in database (run: python scripts/test-fundamentals.py)")
+            print("  2. Criteria too strict (try lowering min_fcf_price_ratio or min_book_to_market)")
+            print("  3. Most TSX stocks don't meet small cap requirement")
+            return
+
+        print(f"\nFound {found} potential multibagger candidates")
         print("\n" + "="*80)
         print("\nNOTE: These are SCREENING RESULTS, not investment recommendations.")
         print("Yartseva's research shows these factors predict 10x returns, but:")
@@ -123,15 +155,27 @@ def screen_multibaggers(limit: int = 20, show_stats: bool = True):
         print("  4. Set stop losses at 5-10% below entry")
 
     except Exception as e:
-        print(f"❌ Error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error: %s", e)
     finally:
         db.close()
 
 
 if __name__ == "__main__":
+    if "--stream" in sys.argv:
+        sys.argv.remove("--stream")
+    else:
+        # A terminal stdout is line-buffered (one write per line); buffer
+        # the report and write it out in large chunks instead
+        sys.stdout.reconfigure(line_buffering=False)
+
+    json_path, parquet_path = pop_export_paths(sys.argv, USAGE)
+
     limit = int(sys.argv[1]) if len(sys.argv) > 1 else 20
     show_stats = "--no-stats" not in sys.argv
 
-    screen_multibaggers(limit=limit, show_stats=show_stats)
+    screen_multibaggers(
+        limit=limit,
+        show_stats=show_stats,
+        json_path=json_path,
+        parquet_path=parquet_path,
+    )
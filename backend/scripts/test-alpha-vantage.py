@@ -10,8 +10,16 @@ This script tests:
 
 import sys
 import os
-import requests
+import hashlib
+import json
+import logging
+import httpx
+import orjson
+import random
+import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 # Add backend to path
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -19,25 +27,133 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from app.config import get_settings
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Successful responses are kept on disk so reruns skip the rate-limited API;
+# pass --refresh to ignore the cache
+CACHE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "alphavantage"
+)
+CACHE_TTLS = {
+    "GLOBAL_QUOTE": 3600,
+    "OVERVIEW": 7 * 86400,
+    "INCOME_STATEMENT": 90 * 86400,
+    "BALANCE_SHEET": 90 * 86400,
+    "CASH_FLOW": 90 * 86400,
+}
+REFRESH_CACHE = "--refresh" in sys.argv[1:]
+
+# One HTTP/2 client for every call: a single connection, reused and
+# multiplexed, instead of a new connection each time. Short connect/read
+# timeouts fail a stalled call fast so av_get can retry it; the transport
+# retries failed connection attempts itself.
+CLIENT = httpx.Client(
+    base_url="https://www.alphavantage.co",
+    headers={"User-Agent": "tsx-trader-test/1.0"},
+    timeout=httpx.Timeout(10.0, connect=3.05),
+    transport=httpx.HTTPTransport(
+        http2=True,
+        retries=3,
+        limits=httpx.Limits(max_keepalive_connections=2),
+    ),
+)
+
+# Start times of the calls in the current rate limit window
+_call_times = deque(maxlen=settings.ALPHA_VANTAGE_RATE_LIMIT)
+_call_times_lock = threading.Lock()
+MAX_RETRIES = 3
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def _wait_for_slot():
+    """Block only while the per-minute budget is exhausted"""
+    with _call_times_lock:
+        if len(_call_times) == _call_times.maxlen:
+            wait = _call_times[0] + 60 - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+        _call_times.append(time.monotonic())
+
+
+def _cache_path(params):
+    key = f"{params['function']}:{params['symbol']}"
+    return os.path.join(CACHE_DIR, hashlib.md5(key.encode()).hexdigest() + ".json")
+
+
+def _read_cache(params):
+    """Get a cached response younger than its function's TTL, or None"""
+    try:
+        with open(_cache_path(params)) as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if time.time() - entry["timestamp"] >= CACHE_TTLS[params["function"]]:
+        return None
+    return entry["data"]
+
+
+def _write_cache(params, data):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(_cache_path(params), "w") as f:
+        json.dump({"timestamp": time.time(), "data": data}, f)
+
+
+def av_get(params, use_cache=True):
+    """GET the Alpha Vantage API within the rate limit
+
+    Timeouts, retryable HTTP statuses and rate limit notes are retried
+    with exponential backoff; the last rate limit note is returned as-is
+    so callers can still report it. Other responses are served from and
+    saved to the on-disk cache unless use_cache is False.
+    """
+    if use_cache and not REFRESH_CACHE:
+        data = _read_cache(params)
+        if data is not None:
+            return data
+
+    for attempt in range(MAX_RETRIES + 1):
+        last_attempt = attempt == MAX_RETRIES
+        _wait_for_slot()
+        try:
+            response = CLIENT.get("/query", params=params)
+        except httpx.TimeoutException:
+            if last_attempt:
+                raise
+        else:
+            if response.status_code not in RETRY_STATUSES or last_attempt:
+                response.raise_for_status()
+                data = orjson.loads(response.content)
+                if "Note" not in data:
+                    if use_cache and "Error Message" not in data and "Information" not in data:
+                        _write_cache(params, data)
+                    return data
+                if last_attempt:
+                    return data
+        time.sleep(2 ** attempt + random.random())
+
+
+def _banner(title):
+    logger.info("=" * 80)
+    logger.info(title)
+    logger.info("=" * 80)
 
 
 def test_api_key():
     """Test if API key is valid"""
-    print("=" * 80)
-    print("TEST 1: API Key Validation")
-    print("=" * 80)
+    _banner("TEST 1: API Key Validation")
 
     if not settings.ALPHA_VANTAGE_API_KEY:
-        print("✗ ERROR: No API key found in environment")
-        print("  Set ALPHA_VANTAGE_API_KEY in .env file")
+        logger.error("✗ ERROR: No API key found in environment")
+        logger.error("  Set ALPHA_VANTAGE_API_KEY in .env file")
         return False
 
-    # Mask API key for display
-    masked_key = settings.ALPHA_VANTAGE_API_KEY[:8] + "..." + settings.ALPHA_VANTAGE_API_KEY[-4:]
-    print(f"API Key: {masked_key}")
+    if logger.isEnabledFor(logging.INFO):
+        # Mask API key for display
+        masked_key = settings.ALPHA_VANTAGE_API_KEY[:8] + "..." + settings.ALPHA_VANTAGE_API_KEY[-4:]
+        logger.info("API Key: %s", masked_key)
 
     # Test with a known US stock
-    print("\nTesting with US stock (AAPL)...")
+    logger.info("\nTesting with US stock (AAPL)...")
 
     params = {
         "function": "GLOBAL_QUOTE",
@@ -45,29 +161,26 @@ def test_api_key():
         "apikey": settings.ALPHA_VANTAGE_API_KEY
     }
 
-    response = requests.get("https://www.alphavantage.co/query", params=params)
-    data = response.json()
+    data = av_get(params, use_cache=False)
 
     if "Global Quote" in data and "05. price" in data["Global Quote"]:
-        price = data["Global Quote"]["05. price"]
-        print(f"✓ API key is valid! AAPL price: ${price}")
+        logger.info("✓ API key is valid! AAPL price: $%s", data["Global Quote"]["05. price"])
         return True
     elif "Note" in data:
-        print(f"✗ Rate limit hit: {data['Note']}")
+        logger.error("✗ Rate limit hit: %s", data["Note"])
         return False
     elif "Error Message" in data:
-        print(f"✗ API error: {data['Error Message']}")
+        logger.error("✗ API error: %s", data["Error Message"])
         return False
     else:
-        print(f"✗ Unexpected response: {data}")
+        logger.error("✗ Unexpected response: %s", data)
         return False
 
 
 def test_tsx_symbol_formats():
     """Test different TSX symbol formats"""
-    print("\n" + "=" * 80)
-    print("TEST 2: TSX Symbol Format Testing")
-    print("=" * 80)
+    logger.info("")
+    _banner("TEST 2: TSX Symbol Format Testing")
 
     # TD Bank - well-known TSX stock
     formats_to_test = [
@@ -78,8 +191,7 @@ def test_tsx_symbol_formats():
     ]
 
     for symbol, description in formats_to_test:
-        print(f"\nTesting {symbol} ({description})...")
-        time.sleep(13)  # Rate limit: 5 calls per minute
+        logger.info("\nTesting %s (%s)...", symbol, description)
 
         params = {
             "function": "GLOBAL_QUOTE",
@@ -87,32 +199,29 @@ def test_tsx_symbol_formats():
             "apikey": settings.ALPHA_VANTAGE_API_KEY
         }
 
-        response = requests.get("https://www.alphavantage.co/query", params=params)
-        data = response.json()
+        data = av_get(params)
 
         if "Global Quote" in data:
             quote = data["Global Quote"]
             if "05. price" in quote and quote["05. price"]:
-                price = quote["05. price"]
-                print(f"✓ SUCCESS! Price: ${price}")
-                print(f"  Full name: {quote.get('01. symbol', 'N/A')}")
+                logger.info("✓ SUCCESS! Price: $%s", quote["05. price"])
+                logger.info("  Full name: %s", quote.get("01. symbol", "N/A"))
                 return symbol  # Return working format
             else:
-                print(f"✗ Empty quote data")
+                logger.info("✗ Empty quote data")
         elif "Note" in data:
-            print(f"⏸ Rate limit: {data['Note']}")
+            logger.warning("⏸ Rate limit: %s", data["Note"])
         else:
-            print(f"✗ No data: {data}")
+            logger.info("✗ No data: %s", data)
 
-    print("\n✗ No working format found for TSX stocks")
+    logger.warning("\n✗ No working format found for TSX stocks")
     return None
 
 
 def test_fundamental_data(symbol):
     """Test if fundamental data is available for TSX stock"""
-    print("\n" + "=" * 80)
-    print(f"TEST 3: Fundamental Data for {symbol}")
-    print("=" * 80)
+    logger.info("")
+    _banner(f"TEST 3: Fundamental Data for {symbol}")
 
     endpoints = [
         ("OVERVIEW", "Company Overview"),
@@ -121,44 +230,45 @@ def test_fundamental_data(symbol):
         ("CASH_FLOW", "Cash Flow"),
     ]
 
-    results = {}
-
-    for function, name in endpoints:
-        print(f"\nTesting {name}...")
-        time.sleep(13)  # Rate limit
-
-        params = {
+    def fetch(function):
+        return av_get({
             "function": function,
             "symbol": symbol,
             "apikey": settings.ALPHA_VANTAGE_API_KEY
-        }
+        })
+
+    # The endpoints are independent, so fetch them concurrently and report in order
+    with ThreadPoolExecutor(max_workers=len(endpoints)) as executor:
+        responses = list(executor.map(fetch, [function for function, _ in endpoints]))
+
+    results = {}
 
-        response = requests.get("https://www.alphavantage.co/query", params=params)
-        data = response.json()
+    for (function, name), data in zip(endpoints, responses):
+        logger.info("\nTesting %s...", name)
 
         if function == "OVERVIEW":
             has_data = "Symbol" in data and data["Symbol"]
             if has_data:
-                print(f"✓ Has data")
-                print(f"  Company: {data.get('Name', 'N/A')}")
-                print(f"  Exchange: {data.get('Exchange', 'N/A')}")
-                print(f"  Market Cap: {data.get('MarketCapitalization', 'N/A')}")
+                logger.info("✓ Has data")
+                logger.info("  Company: %s", data.get("Name", "N/A"))
+                logger.info("  Exchange: %s", data.get("Exchange", "N/A"))
+                logger.info("  Market Cap: %s", data.get("MarketCapitalization", "N/A"))
             else:
-                print(f"✗ No data: {data.keys()}")
+                logger.warning("✗ No data: %s", data.keys())
         else:
             has_quarterly = "quarterlyReports" in data and len(data["quarterlyReports"]) > 0
             has_annual = "annualReports" in data and len(data["annualReports"]) > 0
 
             if has_quarterly or has_annual:
-                print(f"✓ Has data")
+                logger.info("✓ Has data")
                 if has_quarterly:
-                    print(f"  Quarterly reports: {len(data['quarterlyReports'])}")
+                    logger.info("  Quarterly reports: %d", len(data["quarterlyReports"]))
                 if has_annual:
-                    print(f"  Annual reports: {len(data['annualReports'])}")
+                    logger.info("  Annual reports: %d", len(data["annualReports"]))
             elif "Note" in data:
-                print(f"⏸ Rate limit: {data['Note']}")
+                logger.warning("⏸ Rate limit: %s", data["Note"])
             else:
-                print(f"✗ No data: {data.keys()}")
+                logger.warning("✗ No data: %s", data.keys())
 
         results[name] = has_data if function == "OVERVIEW" else (has_quarterly or has_annual)
 
@@ -167,61 +277,67 @@ def test_fundamental_data(symbol):
 
 def main():
     """Run all tests"""
-    print("\n" + "=" * 80)
-    print("ALPHA VANTAGE TSX COMPATIBILITY TEST")
-    print("=" * 80)
-    print()
-    print("This script tests whether Alpha Vantage supports TSX stocks.")
-    print("It will use 5+ API calls, so don't run this multiple times.")
-    print()
+    logger.info("")
+    _banner("ALPHA VANTAGE TSX COMPATIBILITY TEST")
+    logger.info("")
+    logger.info("This script tests whether Alpha Vantage supports TSX stocks.")
+    logger.info("It will use 5+ API calls; responses are cached, pass --refresh to refetch.")
+    logger.info("")
 
     # Test 1: API key
     if not test_api_key():
-        print("\n✗ API key test failed. Fix this first.")
+        logger.error("\n✗ API key test failed. Fix this first.")
         return
 
     # Test 2: TSX symbol formats
-    print("\n⏳ Testing TSX symbol formats (takes ~1 minute)...")
+    logger.info("\n⏳ Testing TSX symbol formats (takes ~1 minute)...")
     working_symbol = test_tsx_symbol_formats()
 
     if not working_symbol:
-        print("\n" + "=" * 80)
-        print("⚠️  IMPORTANT FINDING")
-        print("=" * 80)
-        print()
-        print("Alpha Vantage may not support TSX stocks with their free API.")
-        print()
-        print("ALTERNATIVES:")
-        print("  1. Use Alpha Vantage Premium ($50/month) - might have TSX coverage")
-        print("  2. Switch to different data provider:")
-        print("     • Financial Modeling Prep (has TSX, $15/month)")
-        print("     • Polygon.io (has TSX, $29/month)")
-        print("     • Yahoo Finance (free via yfinance library)")
-        print()
+        logger.warning("")
+        logger.warning("=" * 80)
+        logger.warning("⚠️  IMPORTANT FINDING")
+        logger.warning("=" * 80)
+        logger.warning("")
+        logger.warning("Alpha Vantage may not support TSX stocks with their free API.")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("")
+            logger.info("ALTERNATIVES:")
+            logger.info("  1. Use Alpha Vantage Premium ($50/month) - might have TSX coverage")
+            logger.info("  2. Switch to different data provider:")
+            logger.info("     • Financial Modeling Prep (has TSX, $15/month)")
+            logger.info("     • Polygon.io (has TSX, $29/month)")
+            logger.info("     • Yahoo Finance (free via yfinance library)")
+            logger.info("")
         return
 
     # Test 3: Fundamental data
-    print("\n⏳ Testing fundamental data (takes ~1 minute)...")
+    logger.info("\n⏳ Testing fundamental data (takes ~1 minute)...")
     results = test_fundamental_data(working_symbol)
 
     # Summary
-    print("\n" + "=" * 80)
-    print("TEST SUMMARY")
-    print("=" * 80)
-    print(f"\n✓ Working symbol format: {working_symbol}")
-    print(f"\nFundamental data availability:")
+    logger.info("")
+    _banner("TEST SUMMARY")
+    logger.info("\n✓ Working symbol format: %s", working_symbol)
+    logger.info("\nFundamental data availability:")
     for name, has_data in results.items():
-        status = "✓ Available" if has_data else "✗ Not available"
-        print(f"  {name}: {status}")
+        logger.info("  %s: %s", name, "✓ Available" if has_data else "✗ Not available")
 
     all_available = all(results.values())
     if all_available:
-        print(f"\n✓ SUCCESS! Alpha Vantage has full fundamental data for TSX stocks.")
-        print(f"  Update your symbols to use format: {working_symbol}")
+        logger.info("\n✓ SUCCESS! Alpha Vantage has full fundamental data for TSX stocks.")
+        logger.info("  Update your symbols to use format: %s", working_symbol)
     else:
-        print(f"\n✗ PARTIAL: Some fundamental data is missing.")
-        print(f"  This may limit screening capabilities.")
+        logger.warning("\n✗ PARTIAL: Some fundamental data is missing.")
+        logger.warning("  This may limit screening capabilities.")
 
 
 if __name__ == "__main__":
-    main()
+    # Plain report lines on stdout; LOG_LEVEL=WARNING limits output to problems (e.g. in CI)
+    logging.basicConfig(
+        level=os.environ.get("LOG_LEVEL", "INFO"), format="%(message)s", stream=sys.stdout
+    )
+    try:
+        main()
+    finally:
+        CLIENT.close()
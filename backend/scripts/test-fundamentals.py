@@ -4,6 +4,7 @@ Test fundamental data fetching for a single stock.
 This verifies the Alpha Vantage integration and metric calculations.
 """
 
+import logging
 import sys
 from pathlib import Path
 
@@ -11,11 +12,25 @@ from pathlib import Path
 backend_path = Path(__file__).parent.parent
 sys.path.insert(0, str(backend_path))
 
+from sqlalchemy import func
+
 from app.database import SessionLocal
 from app.models.stock import Stock
 from app.models.fundamentals import FundamentalDataQuarterly
 from app.services.market_data import AlphaVantageService
 
+logger = logging.getLogger(__name__)
+
+
+def money(value) -> str:
+    """Format a dollar amount, or N/A when missing"""
+    return f"${value:,.0f}" if value is not None else "N/A"
+
+
+def pct(value) -> str:
+    """Format a ratio as a percentage, or N/A when missing"""
+    return f"{value*100:.2f}%" if value is not None else "N/A"
+
 
 def test_fundamental_data(symbol: str = "TD.TO"):
     """Test fundamental data fetching for a stock
@@ -54,41 +69,43 @@ def test_fundamental_data(symbol: str = "TD.TO"):
 
         print(f"\n✓ Successfully fetched fundamental data for {symbol}\n")
 
-        # Query and display the latest fundamental data
-        latest = (
-            db.query(FundamentalDataQuarterly)
+        # Query the latest fundamental data and the number of quarters stored
+        row = (
+            db.query(FundamentalDataQuarterly, func.count().over())
             .filter(FundamentalDataQuarterly.stock_id == stock.id)
             .order_by(FundamentalDataQuarterly.fiscal_date.desc())
             .first()
         )
 
-        if not latest:
+        if not row:
             print("No fundamental data found in database")
             return
 
+        latest, count = row
+
         print(f"{'='*60}")
         print(f"Latest Quarterly Data (as of {latest.fiscal_date})")
         print(f"{'='*60}\n")
 
         print(f"MARKET DATA:")
-        print(f"  Market Cap:        ${latest.market_cap:,.0f}" if latest.market_cap else "  Market Cap:        N/A")
-        print(f"  Enterprise Value:  ${latest.enterprise_value:,.0f}" if latest.enterprise_value else "  Enterprise Value:  N/A")
+        print(f"  Market Cap:        {money(latest.market_cap)}")
+        print(f"  Enterprise Value:  {money(latest.enterprise_value)}")
 
         print(f"\nBALANCE SHEET:")
-        print(f"  Total Assets:      ${latest.total_assets:,.0f}" if latest.total_assets else "  Total Assets:      N/A")
-        print(f"  Total Equity:      ${latest.total_equity:,.0f}" if latest.total_equity else "  Total Equity:      N/A")
-        print(f"  Total Debt:        ${latest.total_debt:,.0f}" if latest.total_debt else "  Total Debt:        N/A")
+        print(f"  Total Assets:      {money(latest.total_assets)}")
+        print(f"  Total Equity:      {money(latest.total_equity)}")
+        print(f"  Total Debt:        {money(latest.total_debt)}")
 
         print(f"\nINCOME STATEMENT:")
-        print(f"  Revenue:           ${latest.revenue:,.0f}" if latest.revenue else "  Revenue:           N/A")
-        print(f"  EBITDA:            ${latest.ebitda:,.0f}" if latest.ebitda else "  EBITDA:            N/A")
-        print(f"  Operating Income:  ${latest.operating_income:,.0f}" if latest.operating_income else "  Operating Income:  N/A")
-        print(f"  Net Income:        ${latest.net_income:,.0f}" if latest.net_income else "  Net Income:        N/A")
+        print(f"  Revenue:           {money(latest.revenue)}")
+        print(f"  EBITDA:            {money(latest.ebitda)}")
+        print(f"  Operating Income:  {money(latest.operating_income)}")
+        print(f"  Net Income:        {money(latest.net_income)}")
 
         print(f"\nCASH FLOW:")
-        print(f"  Operating Cash:    ${latest.operating_cash_flow:,.0f}" if latest.operating_cash_flow else "  Operating Cash:    N/A")
-        print(f"  CapEx:             ${latest.capital_expenditures:,.0f}" if latest.capital_expenditures else "  CapEx:             N/A")
-        print(f"  Free Cash Flow:    ${latest.free_cash_flow:,.0f}" if latest.free_cash_flow else "  Free Cash Flow:    N/A")
+        print(f"  Operating Cash:    {money(latest.operating_cash_flow)}")
+        print(f"  CapEx:             {money(latest.capital_expenditures)}")
+        print(f"  Free Cash Flow:    {money(latest.free_cash_flow)}")
 
         print(f"\n{'='*60}")
         print(f"YARTSEVA MULTIBAGGER METRICS")
@@ -110,15 +127,15 @@ def test_fundamental_data(symbol: str = "TD.TO"):
             print(f"  Book/Market:       N/A")
 
         print(f"\nPROFITABILITY:")
-        print(f"  ROA:               {latest.roa*100:.2f}%" if latest.roa else "  ROA:               N/A")
-        print(f"  ROE:               {latest.roe*100:.2f}%" if latest.roe else "  ROE:               N/A")
-        print(f"  EBITDA Margin:     {latest.ebitda_margin*100:.2f}%" if latest.ebitda_margin else "  EBITDA Margin:     N/A")
-        print(f"  EBIT Margin:       {latest.ebit_margin*100:.2f}%" if latest.ebit_margin else "  EBIT Margin:       N/A")
+        print(f"  ROA:               {pct(latest.roa)}")
+        print(f"  ROE:               {pct(latest.roe)}")
+        print(f"  EBITDA Margin:     {pct(latest.ebitda_margin)}")
+        print(f"  EBIT Margin:       {pct(latest.ebit_margin)}")
 
         print(f"\nGROWTH RATES (YoY):")
-        print(f"  Asset Growth:      {latest.asset_growth_rate*100:.2f}%" if latest.asset_growth_rate else "  Asset Growth:      N/A")
-        print(f"  EBITDA Growth:     {latest.ebitda_growth_rate*100:.2f}%" if latest.ebitda_growth_rate else "  EBITDA Growth:     N/A")
-        print(f"  Revenue Growth:    {latest.revenue_growth_rate*100:.2f}%" if latest.revenue_growth_rate else "  Revenue Growth:    N/A")
+        print(f"  Asset Growth:      {pct(latest.asset_growth_rate)}")
+        print(f"  EBITDA Growth:     {pct(latest.ebitda_growth_rate)}")
+        print(f"  Revenue Growth:    {pct(latest.revenue_growth_rate)}")
 
         print(f"\nQUALITY FLAGS:")
         print(f"  Profitable:        {'✓ Yes' if latest.is_profitable else '✗ No'}")
@@ -134,11 +151,6 @@ def test_fundamental_data(symbol: str = "TD.TO"):
 
         print(f"\n{'='*60}\n")
 
-        # Show count of all quarters
-        count = db.query(FundamentalDataQuarterly).filter(
-            FundamentalDataQuarterly.stock_id == stock.id
-        ).count()
-
         print(f"Total quarters in database: {count}")
         print(f"\nTo view all quarters, query the fundamental_data_quarterly table:")
         print(f"  SELECT fiscal_date, fcf_price_ratio, book_to_market, roa")
@@ -147,9 +159,7 @@ def test_fundamental_data(symbol: str = "TD.TO"):
         print(f"  ORDER BY fiscal_date DESC;")
 
     except Exception as e:
-        print(f"❌ Error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("❌ Error: %s", e)
         db.rollback()
     finally:
         db.close()
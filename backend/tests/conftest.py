@@ -0,0 +1,4 @@
+import os
+
+# Settings require a database URL; the tests never connect to it
+os.environ.setdefault("DATABASE_URL", "postgresql://tsx_trader@localhost/tsx_trader_test")
@@ -0,0 +1,74 @@
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+
+import fakeredis
+import pytest
+
+from app.tasks.celery_app import celery_app  # noqa: F401  (binds the shared tasks)
+from app.tasks import trading_tasks
+from app.tasks.trading_tasks import (
+    _start_analysis_run,
+    analyze_symbol_for_user,
+    summarize_trading_analysis,
+)
+
+
+def _fake_analyses(user_id, symbols):
+    return {
+        symbol: {"error": "No data"} if symbol == "BAD.TO"
+        else {"action_taken": symbol == "SHOP.TO", "recommendation": "BUY"}
+        for symbol in symbols
+    }
+
+
+@pytest.fixture
+def redis_client():
+    client = fakeredis.FakeRedis(decode_responses=True)
+    with patch.object(trading_tasks, "get_redis", return_value=client):
+        yield client
+
+
+@pytest.fixture
+def summary_delay(redis_client):
+    db = MagicMock()
+    db.query.return_value.filter.return_value.all.return_value = [(1,), (2,)]
+
+    @contextmanager
+    def fake_db_context():
+        yield db
+
+    with patch.object(trading_tasks, "get_db_context", fake_db_context), \
+            patch.object(trading_tasks, "analyze_symbols_parallel", side_effect=_fake_analyses), \
+            patch.object(analyze_symbol_for_user.backend, "mark_as_done"), \
+            patch.object(summarize_trading_analysis, "delay") as delay:
+        yield delay
+
+
+def test_summary_runs_once_all_batched_parts_complete(redis_client, summary_delay):
+    parts = [(1, "SHOP.TO"), (1, "BAD.TO"), (2, "RY.TO")]
+    _start_analysis_run("run-1", len(parts))
+
+    for user_id, symbol in parts[:-1]:
+        analyze_symbol_for_user.apply(args=(user_id, symbol), kwargs={"run_id": "run-1"})
+        summary_delay.assert_not_called()
+
+    user_id, symbol = parts[-1]
+    analyze_symbol_for_user.apply(args=(user_id, symbol), kwargs={"run_id": "run-1"})
+    summary_delay.assert_called_once_with("run-1")
+
+    totals = summarize_trading_analysis("run-1")
+
+    assert totals[1] == {"decisions": 1, "actions": 1, "errors": 1}
+    assert totals[2] == {"decisions": 1, "actions": 0, "errors": 0}
+    assert not redis_client.exists("analysis_run:run-1:pending")
+
+    # A redelivered part must not report the run twice
+    analyze_symbol_for_user.apply(args=(user_id, symbol), kwargs={"run_id": "run-1"})
+    summary_delay.assert_called_once_with("run-1")
+
+
+def test_untracked_analysis_does_not_enqueue_summary(redis_client, summary_delay):
+    analyze_symbol_for_user.apply(args=(1, "SHOP.TO"))
+
+    summary_delay.assert_not_called()
+    assert not redis_client.keys("analysis_run:*")
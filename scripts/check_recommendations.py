@@ -16,10 +16,11 @@ from pathlib import Path
 backend_path = Path(__file__).parent.parent / "backend"
 sys.path.insert(0, str(backend_path))
 
-from sqlalchemy import create_engine, desc
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import DateTime, Float, bindparam, create_engine, make_url, text
+from sqlalchemy.orm import Session
 import json
 from datetime import datetime, timedelta
+from functools import lru_cache
 
 # Get database URL from environment
 DATABASE_URL = os.getenv('DATABASE_URL')
@@ -32,146 +33,192 @@ if not DATABASE_URL:
     print("  set DATABASE_URL=your-neon-connection-string")
     sys.exit(1)
 
-# Create database connection
-engine = create_engine(DATABASE_URL)
-Session = sessionmaker(bind=engine)
-session = Session()
 
+@lru_cache()
+def get_engine():
+    """Database engine, created on first use and shared for the process
 
-def get_recommendations(hours=24, min_confidence=0.0):
-    """Get recent trading recommendations"""
+    On Postgres, psycopg 3 is used so repeated queries are executed as
+    server-side prepared statements (planned once per connection).
+    """
+    url = make_url(DATABASE_URL)
+    if url.get_backend_name() == "postgresql":
+        url = url.set(drivername="postgresql+psycopg")
+        connect_args = {"prepare_threshold": 1}
+    else:
+        connect_args = {}
+    return create_engine(
+        url,
+        connect_args=connect_args,
+        pool_size=5,
+        max_overflow=5,
+        pool_pre_ping=True,
+        pool_recycle=300,  # Neon closes idle connections after ~5 minutes
+    )
+
+
+ACTIONABLE_MIN_CONFIDENCE = 0.7
+
+# Recent recommendation rows followed by one stats row per decision plus
+# a total row (decision NULL). The time window is scanned once: the CTE is
+# materialized and GROUPING SETS yields the per-decision and total stats
+# in a single aggregation pass. Built once at import so SQLAlchemy's
+# compiled cache and the server-side prepared statement are reused on
+# every execution; the parameters are typed so they bind the same way
+# every time.
+REPORT_QUERY = text("""
+    WITH recent AS MATERIALIZED (
+        SELECT *
+        FROM trading_decisions
+        WHERE created_at >= :since
+    )
+    SELECT
+        'recommendation' AS kind,
+        td.id,
+        s.symbol,
+        s.name as stock_name,
+        td.decision,
+        td.confidence,
+        td.technical_signal,
+        td.sentiment_score,
+        td.reasoning,
+        td.suggested_action,
+        td.action_taken,
+        td.created_at,
+        NULL AS count,
+        NULL AS avg_confidence
+    FROM recent td
+    JOIN stocks s ON td.stock_id = s.id
+    WHERE td.confidence >= :min_confidence
+    UNION ALL
+    SELECT
+        'stat', NULL, NULL, NULL, decision, NULL, NULL, NULL, NULL, NULL, NULL, NULL,
+        COUNT(*),
+        AVG(confidence)
+    FROM recent
+    GROUP BY GROUPING SETS ((decision), ())
+    ORDER BY kind, confidence DESC, created_at DESC, count DESC
+""").bindparams(
+    bindparam("since", type_=DateTime),
+    bindparam("min_confidence", type_=Float),
+)
+
+
+def get_report(session, hours=24, min_confidence=0.0):
+    """Get recent trading recommendations and per-decision stats
+
+    Both come back from one query (one round trip to the database): the
+    recommendation rows followed by one stats row per decision, told
+    apart by the kind column. Stats cover every decision in the window,
+    regardless of confidence.
+
+    Returns:
+        (recommendations, stats, total) where stats rows have decision,
+        count and avg_confidence, ordered by count descending, and total
+        is the same aggregate over all decisions (count 0 and
+        avg_confidence None when the window is empty)
+    """
 
     since = datetime.utcnow() - timedelta(hours=hours)
 
-    query = """
-        SELECT
-            s.symbol,
-            s.name as stock_name,
-            td.decision,
-            td.confidence,
-            td.technical_signal,
-            td.sentiment_score,
-            td.reasoning,
-            td.suggested_action,
-            td.action_taken,
-            td.created_at
-        FROM trading_decisions td
-        JOIN stocks s ON td.stock_id = s.id
-        WHERE td.created_at >= :since
-          AND td.confidence >= :min_confidence
-        ORDER BY td.confidence DESC, td.created_at DESC
-    """
+    rows = session.execute(REPORT_QUERY, {'since': since, 'min_confidence': min_confidence}).fetchall()
+    recommendations = [row for row in rows if row.kind == 'recommendation']
+    stats = [row for row in rows if row.kind == 'stat' and row.decision is not None]
+    # GROUPING SETS always emits the grand-total row, even for an empty window
+    total = next((row for row in rows if row.kind == 'stat' and row.decision is None), None)
+    return recommendations, stats, total
 
-    result = session.execute(query, {'since': since, 'min_confidence': min_confidence})
-    return result.fetchall()
-
-
-def get_actionable():
-    """Get high-confidence buy/sell recommendations"""
-
-    since = datetime.utcnow() - timedelta(hours=24)
-
-    query = """
-        SELECT
-            s.symbol,
-            s.name as stock_name,
-            td.decision,
-            td.confidence,
-            td.technical_signal,
-            td.sentiment_score,
-            td.reasoning,
-            td.suggested_action,
-            td.created_at
-        FROM trading_decisions td
-        JOIN stocks s ON td.stock_id = s.id
-        WHERE td.created_at >= :since
-          AND td.decision IN ('buy', 'sell')
-          AND td.confidence >= 0.7
-          AND td.action_taken = false
-        ORDER BY td.confidence DESC
-    """
 
-    result = session.execute(query, {'since': since})
-    return result.fetchall()
+def get_actionable(recommendations):
+    """Get high-confidence buy/sell recommendations not yet acted on"""
 
+    return [
+        rec for rec in recommendations
+        if rec.decision in ('buy', 'sell')
+        and rec.confidence >= ACTIONABLE_MIN_CONFIDENCE
+        and rec.action_taken is False
+    ]
 
-def print_recommendation(rec):
-    """Pretty print a recommendation"""
 
-    print(f"\n{'='*70}")
-    print(f"Symbol: {rec.symbol} - {rec.stock_name}")
-    print(f"Decision: {rec.decision.upper()}")
-    print(f"Confidence: {rec.confidence:.1%}")
-    print(f"Technical: {rec.technical_signal}")
-    print(f"Sentiment: {rec.sentiment_score:.2f}" if rec.sentiment_score else "Sentiment: N/A")
-    print(f"Created: {rec.created_at.strftime('%Y-%m-%d %H:%M:%S')}")
+def format_recommendation(rec):
+    """Format a recommendation for display"""
 
-    print(f"\nReasoning:")
-    print(f"  {rec.reasoning[:300]}...")
+    lines = [
+        f"\n{'='*70}",
+        f"Symbol: {rec.symbol} - {rec.stock_name}",
+        f"Decision: {rec.decision.upper()}",
+        f"Confidence: {rec.confidence:.1%}",
+        f"Technical: {rec.technical_signal}",
+        f"Sentiment: {rec.sentiment_score:.2f}" if rec.sentiment_score else "Sentiment: N/A",
+        f"Created: {rec.created_at.strftime('%Y-%m-%d %H:%M:%S')}",
+        f"\nReasoning:",
+        f"  {rec.reasoning[:300]}...",
+    ]
 
     if rec.suggested_action:
         try:
             action = json.loads(rec.suggested_action)
-            print(f"\nSuggested Action:")
-            print(f"  Quantity: {action.get('quantity')} shares")
-            print(f"  Entry Price: ${action.get('entry_price', 0):.2f}")
-            print(f"  Stop Loss: ${action.get('stop_loss_price', 0):.2f}")
-            print(f"  Take Profit: ${action.get('take_profit_price', 0):.2f}")
-            print(f"  Order Type: {action.get('order_type', 'N/A')}")
+            lines += [
+                f"\nSuggested Action:",
+                f"  Quantity: {action.get('quantity')} shares",
+                f"  Entry Price: ${action.get('entry_price', 0):.2f}",
+                f"  Stop Loss: ${action.get('stop_loss_price', 0):.2f}",
+                f"  Take Profit: ${action.get('take_profit_price', 0):.2f}",
+                f"  Order Type: {action.get('order_type', 'N/A')}",
+            ]
         except:
             pass
 
+    return "\n".join(lines)
+
 
 def main():
-    print("="*70)
-    print("TSX Trading Recommendations".center(70))
-    print("="*70)
+    # Collect the report and write it once at the end instead of
+    # paying for a stdout write per line
+    out = []
+    p = out.append
+
+    p("="*70)
+    p("TSX Trading Recommendations".center(70))
+    p("="*70)
+
+    # All recent recommendations and the summary stats in one query
+    with Session(get_engine()) as session:
+        all_recs, stats, total = get_report(session, hours=24, min_confidence=0.5)
 
     # Get actionable recommendations
-    actionable = get_actionable()
+    actionable = get_actionable(all_recs)
+    actionable_ids = {rec.id for rec in actionable}
 
     if actionable:
-        print(f"\n🔥 ACTIONABLE RECOMMENDATIONS (High Confidence Buy/Sell):")
-        print(f"   Found {len(actionable)} recommendation(s)\n")
+        p(f"\n🔥 ACTIONABLE RECOMMENDATIONS (High Confidence Buy/Sell):")
+        p(f"   Found {len(actionable)} recommendation(s)\n")
 
         for rec in actionable:
-            print_recommendation(rec)
+            p(format_recommendation(rec))
     else:
-        print(f"\n📊 No high-confidence buy/sell recommendations in the last 24 hours")
-
-    # Get all recent recommendations
-    all_recs = get_recommendations(hours=24, min_confidence=0.5)
+        p(f"\n📊 No high-confidence buy/sell recommendations in the last 24 hours")
 
     if all_recs:
-        print(f"\n\n📈 ALL RECENT RECOMMENDATIONS (Last 24 hours, confidence ≥ 50%):")
-        print(f"   Found {len(all_recs)} recommendation(s)\n")
+        p(f"\n\n📈 ALL RECENT RECOMMENDATIONS (Last 24 hours, confidence ≥ 50%):")
+        p(f"   Found {len(all_recs)} recommendation(s)\n")
 
         for rec in all_recs:
-            if rec not in actionable:  # Don't duplicate
-                print_recommendation(rec)
+            if rec.id not in actionable_ids:  # Don't duplicate
+                p(format_recommendation(rec))
 
     # Summary stats
-    print(f"\n\n{'='*70}")
-    print("SUMMARY".center(70))
-    print(f"{'='*70}")
-
-    stats_query = """
-        SELECT
-            decision,
-            COUNT(*) as count,
-            AVG(confidence) as avg_confidence
-        FROM trading_decisions
-        WHERE created_at >= NOW() - INTERVAL '24 hours'
-        GROUP BY decision
-        ORDER BY count DESC
-    """
-
-    stats = session.execute(stats_query).fetchall()
+    p(f"\n\n{'='*70}")
+    p("SUMMARY".center(70))
+    p(f"{'='*70}")
 
     for stat in stats:
-        print(f"{stat.decision.upper():15} {stat.count:3} decisions (avg confidence: {stat.avg_confidence:.1%})")
+        p(f"{stat.decision.upper():15} {stat.count:3} decisions (avg confidence: {stat.avg_confidence:.1%})")
+
+    if total and total.count:
+        p(f"{'TOTAL':15} {total.count:3} decisions (avg confidence: {total.avg_confidence:.1%})")
 
-    session.close()
+    sys.stdout.write("\n".join(out) + "\n")
 
 
 if __name__ == "__main__":